@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+ANIMATION
+Seamless loops of each style: drifting holographic waves, flowing particles,
+growing drips. Static layers are built once; each frame only redoes what moves
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import compositing
+import profiling
+from wild_generator import PARTICLE_DENSITIES, _splat_discs, hsv_to_rgb_array
+
+FORMATS = ['gif', 'apng', 'frames']
+
+# Wave levels per axis of the holographic color table
+_WAVE_LEVELS = 512
+
+
+def animate(gen, text, style, seed, frames=60, density='standard'):
+    """Yield the frames of a loop of style rendered by generator gen"""
+    if frames < 1:
+        raise ValueError(f"A loop needs at least 1 frame, not {frames}")
+    if style == 'particle':
+        return particle_frames(gen, text, seed, frames, density=density)
+    elif style == 'holographic':
+        return holographic_frames(gen, text, seed, frames)
+    elif style == 'liquid':
+        return liquid_frames(gen, text, seed, frames)
+    else:
+        raise ValueError(f"Unknown style: {style}. Use 'particle', 'holographic', or 'liquid'")
+
+
+def _loop_phase(frame, frames):
+    """Position of a frame in the loop, in [0, 1)"""
+    return frame / frames
+
+
+# ---------------------------------------------------------------- holographic
+
+@lru_cache(maxsize=1)
+def _holographic_colors():
+    """RGB for every pair of quantized wave values, shared by all frames
+    
+    The holographic background is a function of two waves only, so frames
+    look colors up here instead of running HSV over the whole canvas.
+    """
+    levels = np.linspace(0.0, 1.0, _WAVE_LEVELS)
+    wave1, wave2 = levels[:, None], levels[None, :]
+    hue = (wave1 * 0.3 + wave2 * 0.2) % 1.0
+    rgb = hsv_to_rgb_array(hue, 0.7, wave1 * 0.5)
+    colors = (rgb * 255).astype(np.uint8).reshape(-1, 3)
+    colors.flags.writeable = False
+    return colors
+
+
+def holographic_frames(gen, text, seed, frames):
+    """Holographic glitch with its wave pattern drifting once around the loop"""
+    height, width = gen.height, gen.width
+    scale = gen.scale
+    
+    # Static: text masks of the RGB split, glitch lines and scan lines
+    text_mask, _ = gen.create_melted_text_mask(text)
+    shift = round(5 * scale)
+    boosts = [
+        (np.asarray(gen.shift_mask(text_mask, (-shift, 0))) > 128, 100),
+        (np.asarray(text_mask) > 128, 80),
+        (np.asarray(gen.shift_mask(text_mask, (shift, 0))) > 128, 120),
+    ]
+    
+    glitches = gen.glitch_lines(seed)
+    scan_alpha = gen.scan_line_alpha(seed)
+    
+    # Both waves only depend on x + y or x - y, so per frame they are two
+    # short 1-D arrays, spread over the canvas through these index planes
+    y_idx, x_idx = np.ogrid[0:height, 0:width]
+    diagonal = (x_idx + y_idx).astype(np.int32)
+    anti_diagonal = (x_idx - y_idx + height - 1).astype(np.int32)
+    diagonal_coords = np.arange(width + height - 1) / scale
+    anti_diagonal_coords = (np.arange(width + height - 1) - (height - 1)) / scale
+    colors = _holographic_colors()
+    
+    for frame in range(frames):
+        with profiling.span('animation.holographic_frame', frame=frame):
+            phase = 2 * math.pi * _loop_phase(frame, frames)
+            wave1 = np.sin(diagonal_coords * 0.01 + phase) * 0.5 + 0.5
+            wave2 = np.cos(anti_diagonal_coords * 0.008 + phase) * 0.5 + 0.5
+            level1 = np.rint(wave1 * (_WAVE_LEVELS - 1)).astype(np.int32) * _WAVE_LEVELS
+            level2 = np.rint(wave2 * (_WAVE_LEVELS - 1)).astype(np.int32)
+            codes = np.take(level1, diagonal)
+            codes += np.take(level2, anti_diagonal)
+            rgb = np.take(colors, codes, axis=0)
+            
+            # Boost channels where the (shifted) text is
+            for c, (mask, amount) in enumerate(boosts):
+                compositing.add(rgb[:, :, c], amount, mask)
+            
+            for top, bottom, offset in glitches:
+                compositing.shift_rows(rgb, top, bottom, offset)
+            
+            # White scan lines, alpha-composited
+            compositing.alpha_over_rows(rgb, 255, scan_alpha)
+            compositing.saturation(rgb, 1.5)
+        yield Image.fromarray(rgb, 'RGB')
+
+
+# ------------------------------------------------------------------- particle
+
+def particle_frames(gen, text, seed, frames, density='standard'):
+    """Particle field with every particle flowing along the energy field"""
+    height, width = gen.height, gen.width
+    scale = gen.scale
+    
+    # Static: text mask, energy field background and the particle set
+    _, mask_array = gen.create_melted_text_mask(text)
+    bg_rgb = np.asarray(gen.create_energy_field(seed, mask_array))
+    x, y, size, brightness, hue = gen.generate_particle_field(
+        seed, density=PARTICLE_DENSITIES[density])
+    rgb = (hsv_to_rgb_array(hue, 0.8, brightness) * 255).astype(np.uint8)
+    
+    # Flow direction from a smooth field over the canvas, and a start point
+    # along the flow per particle; separate generator so seeds stay stable
+    angle = math.pi * (np.sin(x / scale * 0.004) + np.cos(y / scale * 0.005))
+    travel = 60 * scale
+    flow_x, flow_y = np.cos(angle) * travel, np.sin(angle) * travel
+    start = np.random.default_rng(seed).random(len(x))
+    
+    # Brightness boost and RGB split are per pixel, so the background gets
+    # them once and each frame only redoes the pixels particles cover
+    brighten = np.minimum(np.arange(256) * 1.3, 255).astype(np.uint8)
+    strength = round(3 * scale)
+    static = brighten[bg_rgb]
+    compositing.shift_columns(static[:, :, 0], strength)
+    compositing.shift_columns(static[:, :, 2], -strength)
+    canvas = np.zeros((height, width, 4), dtype=np.uint8)
+    
+    for frame in range(frames):
+        with profiling.span('animation.particle_frame', frame=frame):
+            progress = (start + _loop_phase(frame, frames)) % 1.0
+            px = np.rint(x + flow_x * progress).astype(np.intp)
+            py = np.rint(y + flow_y * progress).astype(np.intp)
+            inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+            on_text = np.zeros_like(inside)
+            on_text[inside] = mask_array[py[inside], px[inside]] > 50
+            
+            # Particles fade in and out along their path, so wrapping back
+            # to the start is invisible and the loop is seamless
+            colors = np.empty((on_text.sum(), 4), dtype=np.uint8)
+            colors[:, :3] = rgb[on_text]
+            colors[:, 3] = brightness[on_text] * np.sin(math.pi * progress[on_text]) * 255
+            _splat_discs(canvas, px[on_text], py[on_text], size[on_text], colors)
+            
+            # Alpha-composite the covered pixels, then brighten and split them
+            ys, xs = np.nonzero(canvas[:, :, 3])
+            particles = canvas[ys, xs].astype(np.uint16)
+            alpha = particles[:, 3:]
+            lit = brighten[(bg_rgb[ys, xs] * (255 - alpha) + particles[:, :3] * alpha + 127) // 255]
+            canvas[ys, xs] = 0
+            
+            frame_rgb = static.copy()
+            for c, offset in enumerate((strength, 0, -strength)):
+                cols = xs + offset
+                keep = (cols >= 0) & (cols < width)
+                frame_rgb[ys[keep], cols[keep], c] = lit[keep, c]
+        yield Image.fromarray(frame_rgb, 'RGB')
+
+
+# --------------------------------------------------------------------- liquid
+
+def _merge_spans(spans, limit):
+    """Clip row spans to [0, limit) and merge overlapping ones"""
+    merged = []
+    for start, stop in sorted((max(a, 0), min(b, limit)) for a, b in spans):
+        if start >= stop:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return [tuple(span) for span in merged]
+
+
+def liquid_frames(gen, text, seed, frames):
+    """Liquid metal with the drips growing and retracting around the loop
+    
+    Only the rows the drips reach (and their reflection and glow) change, so
+    each frame redraws those bands over a fully rendered drip-free frame.
+    """
+    height, width = gen.height, gen.width
+    glow_radius = 10 * gen.scale
+    # Rows of context around a band so the cropped blur matches the full one
+    pad = compositing.blur_reach(glow_radius, gen.quality)
+    
+    # Static: background, chrome shades, drip-free mask and the drip layout
+    base_mask, _ = gen.create_melted_text_mask(text, font_size=220)
+    base_mask = np.asarray(base_mask)
+    drips = gen.place_drips(base_mask.copy(), seed)
+    bg = np.asarray(gen.create_liquid_metal_bg(seed))
+    
+    fade = gen.reflection_fade()
+    
+    def composite(mask_rows, rows):
+        """Chrome text over the background for a band of rows"""
+        return gen.add_chrome(bg[rows].copy(), mask_rows, rows)
+    
+    def reflect(comp, rows):
+        """add_reflections for a band of rows of the composite"""
+        mirrored = comp[height - 1 - np.arange(rows.start, rows.stop)]
+        mirrored = (mirrored * fade[rows][:, None, None]).astype(np.uint8)
+        return compositing.blend(comp[rows].copy(), mirrored, 0.2)
+    
+    def glow(refl, start, stop):
+        """Blurred glow for rows [start, stop), computed on a padded crop"""
+        window = gen.blur_window(slice(start, stop), glow_radius)
+        glow_rows = compositing.gaussian_blur(refl[window], glow_radius, gen.quality)
+        return glow_rows[start - window.start:stop - window.start]
+    
+    # Full drip-free frame, kept as the starting point of every frame
+    comp0 = composite(base_mask, slice(0, height))
+    refl0 = reflect(comp0, slice(0, height))
+    glow0 = glow(refl0, 0, height)
+    blended0 = compositing.blend(refl0.copy(), glow0, 0.3)
+    
+    # Rows the drips can touch, their mirror image, and the glow around both
+    if drips:
+        drip_top = min(top for top, _, _, _, _ in drips)
+        drip_bottom = max(bottom for _, bottom, _, _, _ in drips)
+    else:
+        drip_top = drip_bottom = 0
+    drip_rows = slice(drip_top, drip_bottom)
+    reflect_spans = _merge_spans([(drip_top, drip_bottom),
+                                  (height - drip_bottom, height - drip_top)], height)
+    glow_spans = _merge_spans([(a - pad, b + pad) for a, b in reflect_spans], height)
+    
+    comp = comp0.copy()
+    refl = refl0.copy()
+    
+    for frame in range(frames):
+        with profiling.span('animation.liquid_frame', frame=frame):
+            growth = 0.5 - 0.5 * math.cos(2 * math.pi * _loop_phase(frame, frames))
+            
+            mask_rows = base_mask[drip_rows].copy()
+            for top, bottom, x_start, x_end, ramp in drips:
+                length = math.ceil((bottom - top) * growth)
+                if length:
+                    mask_rows[top - drip_top:top - drip_top + length, x_start:x_end] = ramp[:length, None]
+            
+            if drips:
+                comp[drip_rows] = composite(mask_rows, drip_rows)
+            for start, stop in reflect_spans:
+                refl[start:stop] = reflect(comp, slice(start, stop))
+            
+            blended = blended0.copy()
+            for start, stop in glow_spans:
+                glow_rows = glow(refl, start, stop)
+                blended[start:stop] = refl[start:stop]
+                compositing.blend(blended[start:stop], glow_rows, 0.3)
+            
+            compositing.contrast(blended, 1.4)
+        yield Image.fromarray(blended)
+
+
+# ------------------------------------------------------------------- encoding
+
+def _gif_frame(frame):
+    """Palette conversion, the slow part of GIF encoding"""
+    return frame.quantize(colors=256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+
+
+def save_animation(frames, output_path, fmt='gif', fps=20):
+    """Encode frames while they are still being rendered
+    
+    'frames' writes numbered PNGs into the output_path directory; 'gif' and
+    'apng' write one looping file. Encoding runs on a background thread, so
+    the next frame renders while the previous one is encoded.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown animation format: {fmt}. Use {', '.join(FORMATS)}")
+    if fps < 1:
+        raise ValueError(f"fps must be at least 1, not {fps}")
+    output_path = Path(output_path)
+    duration = round(1000 / fps)
+    
+    with ThreadPoolExecutor(max_workers=1) as encoder:
+        if fmt == 'frames':
+            output_path.mkdir(parents=True, exist_ok=True)
+            pending = [encoder.submit(frame.save, output_path / f"frame_{i:04d}.png", 'PNG')
+                       for i, frame in enumerate(frames)]
+            for future in pending:
+                future.result()
+            return output_path
+        
+        if fmt == 'gif':
+            pending = [encoder.submit(_gif_frame, frame) for frame in frames]
+            encoded = [future.result() for future in pending]
+        else:
+            # Pillow compresses APNG frames together in the final save call
+            encoded = list(frames)
+    
+    if not encoded:
+        raise ValueError("No frames to save")
+    first, rest = encoded[0], encoded[1:]
+    with profiling.span('animation.write', format=fmt, frames=len(encoded)):
+        first.save(output_path, 'GIF' if fmt == 'gif' else 'PNG', save_all=True,
+                   append_images=rest, duration=duration, loop=0)
+    return output_path
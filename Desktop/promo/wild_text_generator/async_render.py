@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+ASYNC RENDER
+asyncio front end for async apps (chat bots, web handlers) that must never block
+Renders run in memory on a bounded thread pool; identical requests in flight share one render
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import batch
+import export
+import result_cache
+from flyer_generator import PartyFlyerGenerator
+from server import QueueFull
+from wild_generator import WildTextGenerator
+
+# Renderer behind the module-level functions, created on first use
+_default = None
+
+
+class _Flight:
+    """One render in progress and the number of requests waiting on it"""
+    
+    def __init__(self, future):
+        self.future = future
+        self.waiters = 0
+
+
+class AsyncRenderer:
+    """Renders for asyncio callers on a pool of worker threads
+    
+    Nothing here touches the disk or blocks the event loop: images come
+    back in memory, or encoded as bytes when a format is given (encoding
+    runs on the pool too). A request equal to one already in flight
+    waits for that render instead of starting another, so a burst of
+    identical requests costs one render. The image is shared between
+    them: copy it before drawing on it.
+    
+    At most workers renders run at once and max_queue more may wait;
+    beyond that a request raises server.QueueFull. A request cancelled
+    or timed out stops waiting at once; its render is dropped if it
+    hasn't started and no one else is waiting on it.
+    """
+    
+    def __init__(self, workers=None, max_queue=64, width=1080, height=1080,
+                 flyer_size=(1080, 1350), quality='max'):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='async-render')
+        self.generator = WildTextGenerator(width, height, quality=quality)
+        self.flyer_generator = PartyFlyerGenerator(*flyer_size, quality=quality)
+        self.renders = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self._inflight = {}
+        self._encoder = export.Exporter(workers=0)
+    
+    async def render(self, text, style, seed=None, density='standard', size=None,
+                     format=None, timeout=None):
+        """WildTextGenerator.render() off the event loop; bytes if format is given"""
+        self._check_format(format)
+        if seed is None:
+            seed = random.randint(0, 999999)
+        key = ('render', text, style, seed, density, _size_key(size), format)
+        cache_key = format and self.generator.result_key(
+            text, style, seed, density, format, self._encoder.options(format), size)
+        return await self._run(key, timeout, self._encoded, format, cache_key, self.generator.render,
+                               text, style, seed, density, size)
+    
+    async def render_flyer(self, party_name, headline, date, venue, style='particle', seed=None,
+                           lineup=None, bottom_text=None, size=None, format=None, timeout=None):
+        """PartyFlyerGenerator.render_flyer() off the event loop; bytes if format is given"""
+        self._check_format(format)
+        if seed is None:
+            seed = random.randint(0, 999999)
+        generator = self.flyer_generator.at_size(*size) if size else self.flyer_generator
+        key = ('flyer', party_name, headline, date, venue, style, seed, tuple(lineup or ()),
+               tuple(bottom_text or ()), _size_key(size), format)
+        cache_key = format and generator.result_key(
+            party_name, headline, date, venue, style, seed, lineup, bottom_text, format,
+            self._encoder.options(format))
+        return await self._run(key, timeout, self._encoded, format, cache_key, generator.render_flyer,
+                               party_name, headline, date, venue, style, seed, lineup, bottom_text)
+    
+    async def render_batch(self, jobs, flyers=False, timeout=None):
+        """Yield (job, result, error) for every job as its render finishes
+        
+        jobs are dicts of render() arguments (render_flyer() ones with
+        flyers=True). The costliest renders are queued first. A failed or
+        timed out job yields its exception as error instead of ending the
+        batch. The renders still pending are cancelled when the generator is
+        closed: to stop early, loop inside contextlib.aclosing(...) or call
+        aclose(); a plain break leaves them running until it is collected.
+        """
+        render = self.render_flyer if flyers else self.render
+        jobs = list(jobs)
+        
+        async def run(job):
+            try:
+                return job, await render(**{'timeout': timeout, **job}), None
+            except Exception as e:
+                return job, None, e
+        
+        # The pool takes renders in the order they are asked for: costliest first
+        tasks = [asyncio.ensure_future(run(jobs[i])) for i in batch.longest_first(jobs, self._cost(flyers))]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def stats(self):
+        """Renders started, requests served by another's render, in flight and rejected"""
+        return {
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'renders': self.renders,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._inflight),
+            'rejected': self.rejected,
+        }
+    
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        self.close()
+    
+    async def _run(self, key, timeout, func, *args):
+        """Await func(*args) on the pool, joining an identical render in flight"""
+        flight = self._inflight.get(key)
+        if flight is None:
+            if len(self._inflight) >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise QueueFull(f"{len(self._inflight)} renders already in flight")
+            loop = asyncio.get_running_loop()
+            flight = self._inflight[key] = _Flight(loop.run_in_executor(self.executor, func, *args))
+            flight.future.add_done_callback(lambda _: self._forget(key, flight))
+            self.renders += 1
+        else:
+            self.coalesced += 1
+        
+        flight.waiters += 1
+        try:
+            # Shielded: one caller giving up must not cancel the others' render
+            return await asyncio.wait_for(asyncio.shield(flight.future), timeout)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.future.done():
+                # Nobody waits any more; a render that hasn't started never will
+                flight.future.cancel()
+                self._forget(key, flight)
+    
+    def _forget(self, key, flight):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+    
+    def _cost(self, flyers):
+        """Estimated seconds of a render_batch() job (see styles.Cost)"""
+        def cost(job):
+            try:
+                if flyers:
+                    size = job.get('size')
+                    generator = self.flyer_generator.at_size(*size) if size else self.flyer_generator
+                    return generator.estimate_headlines(job.get('style', 'particle'))
+                return self.generator.estimate(job['style'], job.get('density', 'standard'), job.get('size'))
+            except (KeyError, TypeError, ValueError):
+                # A bad job yields its error from the render like any other
+                return 0
+        
+        return cost
+    
+    def _check_format(self, format):
+        if format is not None:
+            self._encoder.options(format)
+    
+    def _encoded(self, format, cache_key, render, *args):
+        """Pool task: render, then encode to bytes if a format is given
+        
+        Encoded results also go through the result cache under cache_key,
+        when it is on.
+        """
+        if format is None:
+            return render(*args)
+        
+        data = result_cache.cache.read(cache_key, format)
+        if data is None:
+            image = render(*args)
+            buffer = io.BytesIO()
+            if format == 'jpeg' and image.mode != 'RGB':
+                image = image.convert('RGB')
+            image.save(buffer, export.FORMATS[format], **self._encoder.options(format))
+            data = buffer.getvalue()
+            result_cache.cache.write(cache_key, format, data)
+        return data
+
+
+def _size_key(size):
+    return tuple(size) if size is not None else None
+
+
+def default_renderer():
+    """The shared AsyncRenderer behind render_async() and friends"""
+    global _default
+    if _default is None:
+        _default = AsyncRenderer()
+    return _default
+
+
+async def render_async(text, style, seed=None, **kwargs):
+    """await AsyncRenderer.render() on the shared renderer"""
+    return await default_renderer().render(text, style, seed, **kwargs)
+
+
+async def render_flyer_async(party_name, headline, date, venue, **kwargs):
+    """await AsyncRenderer.render_flyer() on the shared renderer"""
+    return await default_renderer().render_flyer(party_name, headline, date, venue, **kwargs)
+
+
+async def render_batch_async(jobs, flyers=False, timeout=None):
+    """async for job, result, error in AsyncRenderer.render_batch() on the shared renderer"""
+    # Closing this generator closes the renderer's too, cancelling what is pending
+    async with contextlib.aclosing(default_renderer().render_batch(jobs, flyers=flyers,
+                                                                   timeout=timeout)) as results:
+        async for result in results:
+            yield result
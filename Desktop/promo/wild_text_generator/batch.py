@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+BATCH RENDERING
+Spreads --batch renders over a process pool with one warm generator per worker
+Workers save their own files, so only paths and seeds travel back to the parent
+Or over threads in this process, sharing one generator and its caches
+"""
+
+import heapq
+import logging
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import profiling
+
+# The generator owned by this worker process, built once by init_worker
+_generator = None
+
+
+def batch_seeds(base_seed, count):
+    """Seeds for a batch, fixed before any rendering starts"""
+    if base_seed is not None:
+        return [base_seed + i for i in range(count)]
+    rng = random.Random()
+    return [rng.randint(0, 999999) for _ in range(count)]
+
+
+def pick_seed(seeds):
+    """Ask which previewed seed to render at full size; None to skip or if not interactive"""
+    if not sys.stdin.isatty():
+        return None
+    while True:
+        answer = input("🎯 Seed to render at full size (Enter to skip): ").strip()
+        if not answer:
+            return None
+        if answer.isdigit() and int(answer) in seeds:
+            return int(answer)
+        print(f"  Pick one of: {', '.join(map(str, seeds))}")
+
+
+def init_worker(factory, kwargs, profile=False):
+    """Process pool initializer: warm up one generator for this worker"""
+    global _generator
+    # Per-stage chatter from many workers would interleave on the console
+    logging.disable(logging.INFO)
+    if profile:
+        profiling.profiler.enable()
+    _generator = factory(**kwargs)
+
+
+def call_worker(method, kwargs):
+    """Run a generator method on this worker's generator"""
+    return getattr(_generator, method)(**kwargs)
+
+
+def longest_first(jobs, cost=None):
+    """Indices of jobs, the highest cost(job) first; job order without cost
+    
+    Handing a pool its longest jobs first balances the workers: the short
+    ones left at the end fill the gaps, instead of one long render keeping
+    a worker busy after the rest have finished.
+    """
+    if cost is None:
+        return list(range(len(jobs)))
+    costs = [cost(job) for job in jobs]
+    return sorted(range(len(jobs)), key=lambda i: -costs[i])
+
+
+def estimated_wall_time(costs, workers):
+    """Seconds for a pool of workers to get through jobs of these costs, longest first"""
+    loads = [0.0] * max(workers, 1)
+    for seconds in sorted(costs, reverse=True):
+        heapq.heapreplace(loads, loads[0] + seconds)
+    return max(loads)
+
+
+def _profiled(task, job):
+    """Run task(job) and ship the spans it recorded back with its result"""
+    result = task(job)
+    return result, profiling.profiler.drain()
+
+
+def run_parallel(task, jobs, workers, factory, factory_kwargs, on_done=None, cost=None):
+    """Run task(job) for every job across a process pool
+    
+    task must be a module-level function that returns something small and
+    picklable (e.g. seed and output path). on_done(done, total, result) is
+    called as each job finishes; the returned list is in job order. When
+    the profiler is on, workers profile too and their spans are merged here.
+    cost(job) estimates a job's seconds (see styles.py); the pool then
+    starts the most expensive ones first (see longest_first).
+    With workers <= 1 the jobs run one by one in this process instead.
+    """
+    if workers <= 1:
+        return _run_in_process(task, jobs, factory, factory_kwargs, on_done)
+    
+    # Imported here: multiprocessing alone costs a CLI start-up ~20ms
+    from concurrent.futures import ProcessPoolExecutor
+    
+    profile = profiling.profiler.enabled
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(factory, factory_kwargs, profile)) as pool:
+        if profile:
+            futures = {pool.submit(_profiled, task, jobs[i]): i for i in longest_first(jobs, cost)}
+        else:
+            futures = {pool.submit(task, jobs[i]): i for i in longest_first(jobs, cost)}
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            if profile:
+                result, spans = result
+                profiling.profiler.record(spans)
+            results[futures[future]] = result
+            if on_done:
+                on_done(done, len(jobs), result)
+    return results
+
+
+def run_threaded(task, jobs, threads, on_done=None, cost=None):
+    """Run task(job) for every job on a pool of threads in this process
+    
+    Renders own their random generators, so results are the same as one
+    by one; numpy and Pillow release the GIL for the heavy lifting. Fonts,
+    masks and layers are shared, so memory grows far less than with
+    run_parallel. Same on_done, cost and job-ordered results as run_parallel.
+    """
+    if threads <= 1:
+        results = []
+        for done, job in enumerate(jobs, 1):
+            results.append(task(job))
+            if on_done:
+                on_done(done, len(jobs), results[-1])
+        return results
+    
+    results = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='render') as pool:
+        futures = {pool.submit(task, jobs[i]): i for i in longest_first(jobs, cost)}
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if on_done:
+                on_done(done, len(jobs), results[futures[future]])
+    return results
+
+
+def _run_in_process(task, jobs, factory, factory_kwargs, on_done=None):
+    """run_parallel without a pool: same task functions, one generator here"""
+    global _generator
+    _generator = factory(**factory_kwargs)
+    results = []
+    for done, job in enumerate(jobs, 1):
+        results.append(task(job))
+        if on_done:
+            on_done(done, len(jobs), results[-1])
+    return results
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK
+Times every style, every internal stage and the full flyer at several sizes
+Writes JSON and can fail the run when something got slower than a baseline
+"""
+
+import argparse
+import colorsys
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import PIL
+from PIL import Image
+
+import compositing
+import export
+import flyer_generator
+import fonts
+import layers
+import profiling
+import styles
+from flyer_generator import PartyFlyerGenerator
+from wild_generator import WildTextGenerator, hsv_to_rgb_array
+
+SIZES = [(540, 540), (1080, 1080), (2160, 2160), (1080, 1350)]
+FLYER_SIZE = (1080, 1350)
+# Flyer sizes --layout-check covers unless --sizes is given
+LAYOUT_SIZES = [(1080, 1350), (1080, 1080), (1920, 1080), (1080, 1920)]
+TEXT = 'NEXT LEVEL'
+SEED = 42
+
+# Lowest PSNR (dB) against a max render that still counts as the same image
+MIN_PSNR = {'standard': 40, 'draft': 32}
+
+
+def reset_caches():
+    """Drop cached masks and layers so every run does the real work"""
+    fonts.registry.masks.clear()
+    layers.cache.memory.clear()
+    flyer_generator.headline_layers.clear()
+    flyer_generator.info_layers.clear()
+
+
+def stage_cases(gen):
+    """Each internal stage of WildTextGenerator as (setup, func)
+    
+    func is timed on whatever setup() returns; stages that draw into a
+    frame in place get a fresh copy from an untimed setup every run, so
+    no run sees another's output.
+    """
+    text_mask, mask_array = gen.create_melted_text_mask(TEXT)
+    liquid_mask, _ = gen.create_melted_text_mask(TEXT, font_size=220)
+    frame = gen.holographic_layer().copy()
+    
+    def fresh_frame():
+        return (frame.copy(),)
+    
+    def blur_enhance(blended):
+        compositing.blend(blended, compositing.gaussian_blur(blended, 10, gen.quality), 0.3)
+        return compositing.contrast(blended, 1.4)
+    
+    return {
+        'create_melted_text_mask': (None, lambda: gen.create_melted_text_mask(TEXT)),
+        'create_energy_field': (None, lambda: gen.create_energy_field(SEED, mask_array)),
+        'create_holographic_effect': (None, gen.create_holographic_effect),
+        'create_liquid_metal_bg': (None, lambda: gen.create_liquid_metal_bg(SEED)),
+        'add_drip_effect': (None, lambda: gen.add_drip_effect(liquid_mask, SEED)),
+        'add_reflections': (fresh_frame, lambda copy: gen.add_reflections(copy, liquid_mask)),
+        'add_scan_lines': (fresh_frame, lambda copy: gen.add_scan_lines(copy, SEED)),
+        'blur_enhance': (fresh_frame, blur_enhance),
+        'png_save': (None, lambda: Image.fromarray(frame).save(io.BytesIO(), 'PNG')),
+    }
+
+
+def measure(func, repeat, setup=None):
+    """Wall time of func over repeat runs plus its peak traced allocation
+    
+    setup, if given, runs untimed before every run and returns func's arguments.
+    """
+    times = []
+    for _ in range(repeat):
+        reset_caches()
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    
+    # Separate run for memory: tracemalloc would distort the timings
+    reset_caches()
+    args = setup() if setup else ()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        'seconds': statistics.median(times),
+        'min_seconds': min(times),
+        'peak_bytes': peak,
+    }
+
+
+def run(styles, sizes, repeat, stages=True, flyer=True, quality='max', log=print):
+    """Benchmark everything requested; returns {case name: measurement}"""
+    results = {}
+    
+    def record(name, func, setup=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = measure(func, repeat, setup)
+        log(f"  {name:<48} {results[name]['seconds'] * 1000:9.1f} ms"
+            f"  {results[name]['peak_bytes'] / 1e6:8.1f} MB")
+    
+    for size in sizes:
+        width, height = size
+        gen = WildTextGenerator(width, height, quality=quality)
+        log(f"📐 {width}x{height}")
+        
+        for style in styles:
+            record(f"style/{style}/{width}x{height}",
+                   lambda: gen.render(TEXT, style, SEED))
+        
+        if stages:
+            with contextlib.redirect_stdout(io.StringIO()):
+                cases = stage_cases(gen)
+            for stage, (setup, func) in cases.items():
+                record(f"stage/{stage}/{width}x{height}", func, setup)
+    
+    if flyer:
+        flyer_gen = PartyFlyerGenerator(*FLYER_SIZE, quality=quality)
+        log(f"🎉 flyer {FLYER_SIZE[0]}x{FLYER_SIZE[1]}")
+        for style in styles:
+            record(f"flyer/{style}/{FLYER_SIZE[0]}x{FLYER_SIZE[1]}",
+                   lambda: flyer_gen.create_party_flyer(
+                       'BENCHMARK', TEXT, 'FRI DEC 20', 'CLUB ZERO', style=style,
+                       seed=SEED, lineup=['DJ SHADOW', 'MC FLOW'], bottom_text=['TICKETS']))
+    
+    return results
+
+
+def image_error(reference, image):
+    """How far image is from reference: PSNR in dB, mean and max abs difference"""
+    diff = np.abs(np.asarray(reference, dtype=np.int16) - np.asarray(image, dtype=np.int16))
+    mse = float(np.mean(diff.astype(np.float64) ** 2))
+    return {
+        'psnr': 10 * np.log10(255 ** 2 / mse) if mse else float('inf'),
+        'mean_abs': float(diff.mean()),
+        'max_abs': int(diff.max()),
+    }
+
+
+def quality_check(styles, sizes, log=print):
+    """Render every style at every quality tier and measure it against max
+    
+    Returns ({case name: time and error}, failures), failing every tier
+    whose PSNR is below MIN_PSNR.
+    """
+    results, failures = {}, []
+    for size in sizes:
+        width, height = size
+        log(f"📐 {width}x{height}")
+        for style in styles:
+            renders = {}
+            for quality in reversed(compositing.QUALITIES):
+                gen = WildTextGenerator(width, height, quality=quality)
+                reset_caches()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    renders[quality] = gen.render(TEXT, style, SEED)
+                seconds = time.perf_counter() - start
+                
+                name = f"quality/{style}/{quality}/{width}x{height}"
+                results[name] = {'seconds': seconds, **image_error(renders['max'], renders[quality])}
+                ok = results[name]['psnr'] >= MIN_PSNR.get(quality, 0)
+                if not ok:
+                    failures.append(name)
+                log(f"  {'✅' if ok else '❌'} {name:<40} {seconds * 1000:9.1f} ms"
+                    f"  {results[name]['psnr']:6.1f} dB  max diff {results[name]['max_abs']}")
+    return results, failures
+
+
+def thread_check(styles, sizes, threads, log=print):
+    """Render a mix of styles and seeds one by one, then on threads
+    
+    Returns ({case name: both times}, failures); a size fails if any image
+    rendered on threads differs from its serial render.
+    """
+    results, failures = {}, []
+    jobs = [{'text': TEXT, 'style': style, 'seed': SEED + i}
+            for i in range(max(threads, 2)) for style in styles]
+    for size in sizes:
+        width, height = size
+        gen = WildTextGenerator(width, height)
+        timings = {}
+        for mode, count in (('serial', 1), ('threaded', threads)):
+            reset_caches()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                timings[mode] = (gen.render_many(jobs, threads=count), time.perf_counter() - start)
+        
+        (serial, serial_seconds), (threaded, threaded_seconds) = timings['serial'], timings['threaded']
+        differ = sum(not np.array_equal(np.asarray(a), np.asarray(b)) for a, b in zip(serial, threaded))
+        name = f"thread/{threads}/{width}x{height}"
+        results[name] = {'jobs': len(jobs), 'serial_seconds': serial_seconds,
+                         'seconds': threaded_seconds, 'differ': differ}
+        if differ:
+            failures.append(name)
+        log(f"  {'✅' if not differ else '❌'} {name:<40} {len(jobs)} renders: serial "
+            f"{serial_seconds * 1000:.0f} ms, threaded {threaded_seconds * 1000:.0f} ms, {differ} differ")
+    return results, failures
+
+
+def style_check(style_names, sizes, log=print):
+    """Render every style with the profiler on and hold it to its registry entry
+    
+    Returns ({case name: spans and layers seen}, failures); a style fails if
+    the spans below its own differ from Style.stages or the layers it
+    caches differ from Style.layers.
+    """
+    results, failures = {}, []
+    for size in sizes:
+        width, height = size
+        gen = WildTextGenerator(width, height)
+        for name in style_names:
+            style = styles.get(name)
+            reset_caches()
+            profiling.profiler.drain()
+            profiling.profiler.enable(track_memory=False)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    gen.render(TEXT, name, SEED)
+            finally:
+                profiling.profiler.disable()
+            # Depth 0 is render(), depth 1 the style's own method
+            stages = [span['name'] for span in profiling.profiler.drain() if span['depth'] >= 2]
+            cached = list(dict.fromkeys(key[:2] for key in layers.cache.memory.keys()))
+            
+            case = f"style/{name}/{width}x{height}"
+            results[case] = {'stages': stages, 'layers': cached}
+            problems = []
+            if stages != list(style.stages):
+                problems.append(f"stages {stages}")
+            if set(cached) != set(style.layers):
+                problems.append(f"layers {cached}")
+            if problems:
+                failures.append(case)
+            log(f"  {'❌' if problems else '✅'} {case:<40} {len(stages)} stages, {len(cached)} layers"
+                + ''.join(f"\n      emitted {problem}" for problem in problems))
+    return results, failures
+
+
+def parity_check(steps=32, log=print):
+    """Compare hsv_to_rgb_array with colorsys.hsv_to_rgb over an HSV grid
+    
+    Hue steps land on every sector boundary. Returns ({case name: worst
+    8-bit difference}, failures); it fails if any channel is more than 1 off.
+    """
+    hues = np.linspace(0, 1, 6 * steps + 1)
+    levels = np.linspace(0, 1, steps + 1)
+    h, s, v = (grid.ravel() for grid in np.meshgrid(hues, levels, levels, indexing='ij'))
+    
+    start = time.perf_counter()
+    vectorized = (hsv_to_rgb_array(h, s, v) * 255).astype(int)
+    seconds = time.perf_counter() - start
+    reference = np.array([[int(c * 255) for c in colorsys.hsv_to_rgb(*hsv)] for hsv in zip(h, s, v)])
+    
+    name = 'parity/hsv_to_rgb_array'
+    worst = int(np.abs(vectorized - reference).max())
+    results = {name: {'seconds': seconds, 'colors': len(h), 'max_abs': worst}}
+    failures = [name] if worst > 1 else []
+    log(f"  {'✅' if worst <= 1 else '❌'} {name:<40} {len(h)} colors, max diff {worst}")
+    return results, failures
+
+
+def layout_check(sizes, log=print):
+    """Lay out flyer details with a long lineup at every size
+    
+    Returns ({case name: rows of each text block}, failures); a size fails
+    if the headline, details and bottom text overlap or run off the canvas.
+    """
+    results, failures = {}, []
+    lineup = ['DJ SHADOW', 'MC FLOW', 'THE NIGHT SHIFT', 'LOW FREQ', 'B2B SESSIONS', 'CLOSING SET']
+    bottom_text = ['TICKETS AT THE DOOR', 'CLUBZERO.EXAMPLE']
+    for size in sizes:
+        width, height = size
+        gen = PartyFlyerGenerator(width, height)
+        lines = gen.party_info_layout(gen.canvas_size, 'BENCHMARK', 'FRI DEC 20', 'CLUB ZERO',
+                                      lineup, bottom_text)
+        rows = [(y + font.getbbox(text)[1], y + font.getbbox(text)[3]) for text, font, _, (_, y) in lines]
+        details, bottom = rows[:-len(bottom_text)], rows[-len(bottom_text):]
+        # Where compose_flyer() pastes the headline
+        headline_top = gen._px(50)
+        blocks = {
+            'headline': (headline_top, headline_top + gen.headline_size()[1]),
+            'details': (min(top for top, _ in details), max(end for _, end in details)),
+            'bottom': (min(top for top, _ in bottom), max(end for _, end in bottom)),
+        }
+        
+        name = f"layout/{width}x{height}"
+        results[name] = blocks
+        extents = list(blocks.values())
+        ok = extents[-1][1] <= height and all(a[1] <= b[0] for a, b in zip(extents, extents[1:]))
+        if not ok:
+            failures.append(name)
+        log(f"  {'✅' if ok else '❌'} {name:<40} "
+            + ', '.join(f"{block} {top}-{end}" for block, (top, end) in blocks.items()))
+    return results, failures
+
+
+def fit_costs(style_names, sizes, repeat, quality='max', log=print):
+    """Time every style at every size (and particle density) and fit its cost model
+    
+    Returns ({case name: measurement}, {style: styles.Cost}). Each fit is a
+    least-squares line through the median times, with negative terms
+    clamped to 0.
+    """
+    results, fitted = {}, {}
+    for name in style_names:
+        style = styles.get(name)
+        densities = list(styles.PARTICLE_DENSITIES) if style.uses_density else ['standard']
+        terms, seconds = [], []
+        for size in sizes:
+            width, height = size
+            gen = WildTextGenerator(width, height, quality=quality)
+            for density in densities:
+                case = f"cost/{name}/{density}/{width}x{height}"
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[case] = measure(lambda: gen.render(TEXT, name, SEED, density=density), repeat)
+                particles = styles.PARTICLE_DENSITIES[density] if style.uses_density else 0
+                terms.append([1, width * height / 1e6, particles])
+                seconds.append(results[case]['seconds'])
+                log(f"  {case:<48} {seconds[-1] * 1000:9.1f} ms"
+                    f"  (model {style.estimate(width, height, density) * 1000:9.1f} ms)")
+        
+        coefficients = np.linalg.lstsq(np.array(terms, dtype=float), np.array(seconds), rcond=None)[0]
+        fitted[name] = styles.Cost(*np.maximum(coefficients, 0).tolist())
+    return results, fitted
+
+
+def compare(results, baseline, max_slowdown):
+    """Cases slower than baseline by more than max_slowdown (0.2 = 20%)"""
+    regressions = []
+    for name, current in sorted(results.items()):
+        if name not in baseline:
+            continue
+        before = baseline[name]['seconds']
+        ratio = current['seconds'] / before if before > 0 else 1.0
+        if ratio > 1 + max_slowdown:
+            regressions.append((name, before, current['seconds'], ratio))
+    return regressions
+
+
+def environment():
+    return {
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pillow': PIL.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='⏱️  WILD TEXT BENCHMARK - Time every style, stage and size',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 benchmark.py --output bench.json
+  python3 benchmark.py --sizes 1080 --styles liquid --baseline bench.json
+  python3 benchmark.py --baseline bench.json --max-slowdown 0.1
+  python3 benchmark.py --quality-check --sizes 1080 2160
+  python3 benchmark.py --thread-check 4 --sizes 540 1080
+  python3 benchmark.py --fit-costs --sizes 540 1080 1620 2160
+  python3 benchmark.py --layout-check
+  python3 benchmark.py --parity-check
+  python3 benchmark.py --style-check --sizes 540
+        """
+    )
+    
+    parser.add_argument('--styles', nargs='+', default=styles.names(), choices=styles.names(),
+                        help='Styles to benchmark (default: all)')
+    parser.add_argument('--sizes', nargs='+', type=export.size_type,
+                        help='Canvas sizes, N or WxH (default: 540 1080 2160 1080x1350; '
+                             'for --layout-check 1080x1350 1080 1920x1080 1080x1920)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case (default: 3)')
+    parser.add_argument('--no-stages', action='store_true', help='Skip per-stage timings')
+    parser.add_argument('--no-flyer', action='store_true', help='Skip full flyer timings')
+    parser.add_argument('--quality', default='max', choices=compositing.QUALITIES,
+                        help='Blur quality tier of the timed cases (default: max)')
+    parser.add_argument('--quality-check', action='store_true',
+                        help='Instead, time every tier and fail if one drifts too far from max')
+    parser.add_argument('--thread-check', type=int, metavar='THREADS',
+                        help='Instead, render on THREADS threads and fail unless it matches serial')
+    parser.add_argument('--fit-costs', action='store_true',
+                        help='Instead, time every style across --sizes and densities and print '
+                             'the cost models for styles.py')
+    parser.add_argument('--style-check', action='store_true',
+                        help="Instead, fail if a style's spans or cached layers differ from styles.py")
+    parser.add_argument('--parity-check', action='store_true',
+                        help='Instead, fail if hsv_to_rgb_array drifts more than 1 level from colorsys')
+    parser.add_argument('--layout-check', action='store_true',
+                        help='Instead, lay out flyer details at each size and fail if text blocks overlap')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against a previous --output JSON')
+    parser.add_argument('--max-slowdown', type=float, default=0.25,
+                        help='Fail when a case is this much slower than baseline (default: 0.25 = 25%%)')
+    
+    args = parser.parse_args()
+    sizes = args.sizes or (LAYOUT_SIZES if args.layout_check else SIZES)
+    
+    output = Path(args.output).resolve() if args.output else None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    
+    print("⏱️  WILD TEXT BENCHMARK")
+    print("=" * 50)
+    
+    # Generators write output/ and flyers/ into the working directory
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            if args.quality_check:
+                results, failures = quality_check(args.styles, sizes)
+            elif args.thread_check:
+                results, failures = thread_check(args.styles, sizes, args.thread_check)
+            elif args.fit_costs:
+                results, fitted = fit_costs(args.styles, sizes, args.repeat, quality=args.quality)
+            elif args.style_check:
+                results, failures = style_check(args.styles, sizes)
+            elif args.parity_check:
+                results, failures = parity_check()
+            elif args.layout_check:
+                results, failures = layout_check(sizes)
+            else:
+                results = run(args.styles, sizes, args.repeat, stages=not args.no_stages,
+                              flyer=not args.no_flyer, quality=args.quality)
+        finally:
+            os.chdir(cwd)
+    
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'environment': environment(), 'repeat': args.repeat,
+                       'quality': args.quality, 'results': results}, f, indent=2)
+        print(f"💾 Results: {output}")
+    
+    if args.quality_check:
+        print("=" * 50)
+        if not failures:
+            print("✅ Every quality tier stays close to max")
+            return 0
+        print(f"❌ {len(failures)} case(s) below their minimum PSNR ({MIN_PSNR}):")
+        for name in failures:
+            print(f"  • {name}")
+        return 1
+    
+    if args.thread_check:
+        print("=" * 50)
+        if not failures:
+            print("✅ Threaded renders match serial renders")
+            return 0
+        print(f"❌ {len(failures)} size(s) where threaded renders differ from serial:")
+        for name in failures:
+            print(f"  • {name}")
+        return 1
+    
+    if args.style_check:
+        print("=" * 50)
+        if not failures:
+            print("✅ Every style's spans and layers match styles.py")
+            return 0
+        print(f"❌ {len(failures)} case(s) where a style no longer matches styles.py:")
+        for name in failures:
+            print(f"  • {name}")
+        return 1
+    
+    if args.parity_check:
+        print("=" * 50)
+        if not failures:
+            print("✅ hsv_to_rgb_array matches colorsys within 1 level")
+            return 0
+        print("❌ hsv_to_rgb_array is more than 1 level off colorsys")
+        return 1
+    
+    if args.layout_check:
+        print("=" * 50)
+        if not failures:
+            print("✅ Flyer text blocks stay clear of each other at every size")
+            return 0
+        print(f"❌ {len(failures)} size(s) where flyer text blocks overlap:")
+        for name in failures:
+            print(f"  • {name}")
+        return 1
+    
+    if args.fit_costs:
+        print("=" * 50)
+        print("📈 Cost models fitted from this run (for styles.py):")
+        for name, cost in fitted.items():
+            print(f"  {name:<12} {cost!r}")
+        return 0
+    
+    if baseline is None:
+        return 0
+    
+    regressions = compare(results, baseline, args.max_slowdown)
+    print("=" * 50)
+    if not regressions:
+        print(f"✅ No case slower than baseline by more than {args.max_slowdown:.0%}")
+        return 0
+    
+    print(f"❌ {len(regressions)} case(s) slower than baseline by more than {args.max_slowdown:.0%}:")
+    for name, before, after, ratio in regressions:
+        print(f"  • {name}: {before * 1000:.1f} ms → {after * 1000:.1f} ms ({ratio:.2f}x)")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+CACHE
+Small in-process LRU cache shared by the font registry and render layers
+"""
+
+import threading
+from collections import OrderedDict
+
+
+def default_sizeof(value):
+    """Bytes held by a cached value (numpy arrays report nbytes)"""
+    return getattr(value, 'nbytes', 0)
+
+
+class LRUCache:
+    """Least-recently-used cache bounded by entry count and/or total bytes"""
+    
+    def __init__(self, maxsize=None, max_bytes=None, sizeof=default_sizeof):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def __contains__(self, key):
+        return key in self._entries
+    
+    def get(self, key, default=None):
+        """Return a cached value and mark it recently used"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return default
+    
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries to fit"""
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return value
+            
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self._entries and self._over_budget():
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+        return value
+    
+    def get_or_create(self, key, factory):
+        """Return the cached value for key, building it with factory() on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+        return self.put(key, factory())
+    
+    def keys(self):
+        """Cached keys, least recently used first"""
+        with self._lock:
+            return list(self._entries)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+    
+    def stats(self):
+        """Hit/miss counters and current size"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+        }
+    
+    def _over_budget(self):
+        if self.maxsize is not None and len(self._entries) > self.maxsize:
+            return True
+        return self.max_bytes is not None and self.bytes > self.max_bytes
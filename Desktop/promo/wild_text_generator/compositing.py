@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+COMPOSITING
+In-place blend modes on (height, width, 3) uint8 frame buffers
+Same arithmetic as Pillow, so renders stay pixel-identical without round trips
+"""
+
+import math
+from functools import lru_cache
+
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+ImageFilter = lazy_import('PIL.ImageFilter')
+
+# Whole-frame float math runs in bands of rows, so temporaries stay small
+BAND_ROWS = 64
+
+# Blur quality tiers. Below max, large blurs run on a downsampled frame:
+# at most this much smaller, and never to below this radius
+QUALITIES = ['draft', 'standard', 'max']
+_MAX_DOWNSAMPLE = {'draft': 8, 'standard': 4, 'max': 1}
+_MIN_SMALL_RADIUS = {'draft': 2.5, 'standard': 5, 'max': math.inf}
+
+
+def _bands(height):
+    for top in range(0, height, BAND_ROWS):
+        yield slice(top, top + BAND_ROWS)
+
+
+def _mix(out, base, top, factor):
+    """out = base + factor * (top - base), the way Image.blend computes it
+    
+    Pillow works in float32, truncates to uint8 and clips when factor is
+    outside [0, 1]. base may be a scalar; out may be base or top itself.
+    """
+    mixed = np.subtract(top, base, dtype=np.float32)
+    mixed *= np.float32(factor)
+    mixed += base
+    np.clip(mixed, 0, 255, out=out, casting='unsafe')
+
+
+def blend(frame, other, alpha):
+    """Image.blend(frame, other, alpha), written into frame"""
+    for rows in _bands(len(frame)):
+        _mix(frame[rows], frame[rows], other[rows], alpha)
+    return frame
+
+
+def brightness(frame, factor):
+    """ImageEnhance.Brightness(frame).enhance(factor), in place"""
+    for rows in _bands(len(frame)):
+        _mix(frame[rows], 0, frame[rows], factor)
+    return frame
+
+
+def contrast(frame, factor, mean=None):
+    """ImageEnhance.Contrast(frame).enhance(factor), in place
+    
+    mean is the whole image's mean luminance, when frame is one band of it.
+    """
+    if mean is None:
+        mean = int(luminance_sum(frame) / (frame.shape[0] * frame.shape[1]) + 0.5)
+    for rows in _bands(len(frame)):
+        _mix(frame[rows], mean, frame[rows], factor)
+    return frame
+
+
+def saturation(frame, factor):
+    """ImageEnhance.Color(frame).enhance(factor), in place"""
+    for rows in _bands(len(frame)):
+        gray = _luma(frame[rows])[:, :, None]
+        _mix(frame[rows], gray, frame[rows], factor)
+    return frame
+
+
+@lru_cache(maxsize=1)
+def _luma_weights():
+    """Pillow's RGB -> L weights (16-bit fixed point)
+    
+    Every weighted sum stays below 2**24, so float32 matrix products
+    compute it exactly.
+    """
+    return np.array([19595, 38470, 7471], dtype=np.float32)
+
+
+def _luma(frame):
+    """frame.convert('L') as whole float32 values"""
+    luma = frame.astype(np.float32) @ _luma_weights()
+    luma += 0x8000
+    luma *= np.float32(1 / 65536)
+    return np.floor(luma, out=luma)
+
+
+def luminance(frame):
+    """frame.convert('L'): ITU-R 601 luma with Pillow's 16-bit fixed point"""
+    return _luma(frame).astype(np.uint8)
+
+
+def luminance_sum(frame):
+    """Sum of luminance(frame), a band at a time"""
+    return sum(int(_luma(frame[rows]).sum(dtype=np.float64)) for rows in _bands(len(frame)))
+
+
+def alpha_over(frame, color, alpha, rows=None, cols=None):
+    """Image.alpha_composite of color with alpha over an opaque frame, in place
+    
+    Only pixels with alpha > 0 are touched. color is (h, w, 3) or a fixed
+    color. Callers that already know the pixels to blend pass their rows
+    and cols (as from np.nonzero), with alpha and color given per pixel.
+    """
+    if rows is None:
+        rows, cols = np.nonzero(alpha)
+        alpha = alpha[rows, cols]
+        if np.ndim(color) == 3:
+            color = color[rows, cols]
+    alpha = alpha.astype(np.uint16)[:, None]
+    under = frame[rows, cols].astype(np.uint16)
+    under *= 255 - alpha
+    under += np.asarray(color, dtype=np.uint16) * alpha
+    under += 127
+    under //= 255
+    frame[rows, cols] = under
+    return frame
+
+
+def alpha_over_rows(frame, color, row_alpha):
+    """alpha_over with one alpha per row, e.g. scan lines; only rows with alpha > 0"""
+    rows = np.flatnonzero(row_alpha)
+    alpha = row_alpha[rows].astype(np.uint16)[:, None, None]
+    lines = frame[rows].astype(np.uint16)
+    lines *= 255 - alpha
+    lines += np.asarray(color, dtype=np.uint16) * alpha
+    lines += 127
+    lines //= 255
+    frame[rows] = lines
+    return frame
+
+
+def add(channel, amount, where):
+    """Saturating add of amount to channel where the boolean mask is set"""
+    table = np.minimum(np.arange(256) + amount, 255).astype(np.uint8)
+    channel[where] = table[channel[where]]
+    return channel
+
+
+def screen(frame, other):
+    """ImageChops.screen(frame, other), in place"""
+    for rows in _bands(len(frame)):
+        inverse = np.subtract(255, frame[rows], dtype=np.uint16)
+        inverse *= 255 - other[rows]
+        inverse //= 255
+        np.subtract(255, inverse, out=inverse)
+        frame[rows] = inverse
+    return frame
+
+
+def shift_columns(channel, offset):
+    """Move a 2-D channel offset pixels right (left if negative), filling with 0"""
+    if offset > 0:
+        channel[:, offset:] = channel[:, :-offset]
+        channel[:, :offset] = 0
+    elif offset < 0:
+        channel[:, :offset] = channel[:, -offset:]
+        channel[:, offset:] = 0
+    return channel
+
+
+def shift_rows(frame, top, bottom, offset):
+    """Move rows [top, bottom) sideways like pasting their crop at (offset, top)"""
+    width = frame.shape[1]
+    if offset >= 0:
+        frame[top:bottom, offset:] = frame[top:bottom, :width - offset]
+    else:
+        frame[top:bottom, :width + offset] = frame[top:bottom, -offset:]
+    return frame
+
+
+def blur_factor(radius, quality='max'):
+    """How many times smaller gaussian_blur makes the frame it blurs (1 = not at all)
+    
+    Always a power of two, so resampling maps rows exactly and a band of a
+    frame blurs the same as the whole frame (see padded_rows).
+    """
+    if quality not in QUALITIES:
+        raise ValueError(f"Unknown quality: {quality}. Use {', '.join(QUALITIES)}")
+    limit = int(max(1, min(_MAX_DOWNSAMPLE[quality], radius // _MIN_SMALL_RADIUS[quality])))
+    return 1 << (limit.bit_length() - 1)
+
+
+def blur_reach(radius, quality='max'):
+    """Rows a gaussian_blur of radius pulls in from each side
+    
+    Pillow runs three box blurs of this box radius, each reaching one pixel
+    past it; one more pixel per pass covers float rounding. Downsampled
+    blurs reach a little further through the resampling on either side.
+    """
+    factor = blur_factor(radius, quality)
+    if factor > 1:
+        return factor * (blur_reach(_small_radius(radius, factor)) + 2)
+    sigma2 = radius * radius / 3
+    box = math.floor((math.sqrt(12 * sigma2 + 1) - 1) / 2)
+    box += (2 * box + 1) * (box * (box + 1) - 3 * sigma2) / (6 * (sigma2 - (box + 1) ** 2))
+    return 3 * (int(box) + 2)
+
+
+def padded_rows(rows, reach, height, align=1):
+    """Slice rows widened by reach on both sides, within a frame of height rows
+    
+    align moves the start down to a multiple of it, so a downsampled blur
+    of the slice (see blur_factor) averages the same blocks as the frame's.
+    """
+    return slice(max(rows.start - reach, 0) // align * align, min(rows.stop + reach, height))
+
+
+def gaussian_blur(frame, radius, quality='max'):
+    """Gaussian blur of a frame, on Pillow's C box-blur; returns a new frame"""
+    return np.asarray(blur_image(Image.fromarray(frame), radius, quality))
+
+
+def blur_image(image, radius, quality='max'):
+    """Gaussian blur of a Pillow image at a quality tier
+    
+    max is Pillow's GaussianBlur. Lower tiers shrink the image by
+    blur_factor(), blur it with the radius left over, and scale it back up
+    bilinearly: a fraction of the work, visibly the same for big radii.
+    """
+    factor = blur_factor(radius, quality)
+    if factor == 1:
+        return image.filter(ImageFilter.GaussianBlur(radius=radius))
+    
+    width, height = image.size
+    small = image.reduce(factor).filter(ImageFilter.GaussianBlur(radius=_small_radius(radius, factor)))
+    return small.resize((width, height), Image.BILINEAR, box=(0, 0, width / factor, height / factor))
+
+
+def _small_radius(radius, factor):
+    """Blur radius on a frame downsampled by factor that adds up to radius
+    
+    Box downsampling and bilinear upsampling blur by about (f^2 - 1) / 12
+    and f^2 / 6 square pixels; the small blur makes up the rest.
+    """
+    variance = radius * radius - (factor * factor - 1) / 12 - factor * factor / 6
+    return math.sqrt(max(variance, 0.25)) / factor
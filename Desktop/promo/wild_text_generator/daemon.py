@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+RENDER DAEMON
+Keeps one process resident with numpy, Pillow, fonts and caches warm
+CLI runs forward their arguments to it over a local Unix socket instead of starting cold
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import logging
+import os
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+# Overrides the socket path, e.g. to run one daemon per project
+SOCKET_ENV = 'WILD_DAEMON_SOCKET'
+
+# The only environment a run forwards: the CLIs' own settings (cache dirs and
+# sizes, this socket) and where fonts.py looks for fonts
+ENV_PREFIX = 'WILD_'
+ENV_NAMES = ('XDG_DATA_HOME',)
+
+# CLIs the daemon runs; each has main(argv) with a --no-daemon flag
+PROGRAMS = ('flyer_generator', 'wild_generator')
+
+# Imported when the daemon starts, so the first request is warm too
+_WARM_MODULES = ['numpy', 'PIL.Image', 'PIL.ImageDraw', 'PIL.ImageEnhance', 'PIL.ImageFilter',
+                 'PIL.ImageFont', *PROGRAMS]
+
+
+def socket_path():
+    """Where the daemon listens: $WILD_DAEMON_SOCKET, else in the user's private runtime dir"""
+    return os.environ.get(SOCKET_ENV) or os.path.join(_private_dir(), 'wild-render.sock')
+
+
+def _private_dir():
+    """$XDG_RUNTIME_DIR, else a wild-render-<uid> dir in the temp dir that serve() makes 0700"""
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime and os.path.isdir(runtime):
+        return runtime
+    return os.path.join(tempfile.gettempdir(), f'wild-render-{os.getuid()}')
+
+
+def _check_private_dir(directory):
+    """Make directory 0700 if it is missing; refuse one another user could write to"""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        sys.exit(f"❌ {directory} must be a directory only you can use (mode 0700); "
+                 f"remove it or set {SOCKET_ENV}")
+
+
+def _owned_socket(path):
+    """Whether path is a socket of this user's; False if it is missing"""
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    if stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid():
+        return True
+    print(f"⚠️  Ignoring {path}: not a socket of yours", file=sys.stderr)
+    return False
+
+
+def _peer_uid(connection):
+    """User id of the process at the other end of a Unix socket, where the OS tells"""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', credentials)[1]
+
+
+def _forwarded(name):
+    return name.startswith(ENV_PREFIX) or name in ENV_NAMES
+
+
+def forwarded_env(env=None):
+    """The part of env (default: os.environ) a run sends along to the daemon"""
+    return {name: value for name, value in (env or os.environ).items() if _forwarded(name)}
+
+
+def forward(program, argv):
+    """Run program's CLI with argv in the daemon; its exit code, or None if none is running
+    
+    Output streams back to this process's stdout and stderr as it is
+    written. The daemon works in this process's directory, with this
+    process's forwarded_env(). Only a daemon run by this same user is used.
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    path = socket_path()
+    if not _owned_socket(path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except OSError:
+        client.close()
+        return None
+    if _peer_uid(client) not in (None, os.getuid()):
+        # Swapped in between the check above and connecting
+        client.close()
+        print(f"⚠️  Ignoring {path}: the daemon on it is another user's", file=sys.stderr)
+        return None
+    
+    request = {'program': program, 'argv': list(argv), 'cwd': os.getcwd(), 'env': forwarded_env()}
+    with client, client.makefile('rb') as replies:
+        client.sendall(json.dumps(request).encode() + b'\n')
+        for line in replies:
+            message = json.loads(line)
+            if 'exit' in message:
+                return message['exit']
+            stream = sys.stderr if message['stream'] == 'err' else sys.stdout
+            stream.write(message['text'])
+            stream.flush()
+    print("❌ Render daemon hung up mid-request", file=sys.stderr)
+    return 1
+
+
+class ServeAction(argparse.Action):
+    """--daemon: serve until stopped, without the arguments a render would require"""
+    
+    def __init__(self, option_strings, dest, help=None):
+        super().__init__(option_strings, dest, nargs=0, default=argparse.SUPPRESS, help=help)
+    
+    def __call__(self, parser, namespace, values, option_string=None):
+        serve()
+        parser.exit()
+
+
+def serve(path=None):
+    """Listen on path and run forwarded CLI requests one at a time until Ctrl-C
+    
+    Requests run in this process, one after another, so they share every
+    module-level cache (fonts, layers, headline renders); a request's
+    renders still use its --workers/--threads.
+    """
+    if path is None and not os.environ.get(SOCKET_ENV):
+        _check_private_dir(_private_dir())
+    path = path or socket_path()
+    if running(path):
+        sys.exit(f"❌ A render daemon is already listening on {path}")
+    with contextlib.suppress(FileNotFoundError):
+        # Left behind by a daemon that didn't shut down cleanly
+        os.unlink(path)
+    
+    print("🔥 Warming up...")
+    started = time.perf_counter()
+    for name in _WARM_MODULES:
+        importlib.import_module(name)
+    # Renders log through the root logger to the client being served
+    logging.basicConfig(level=logging.INFO, format='%(message)s', handlers=[_ClientHandler()], force=True)
+    print(f"   Ready in {time.perf_counter() - started:.1f}s")
+    
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Only this user may connect: requests run with the daemon's rights
+    umask = os.umask(0o177)
+    try:
+        listener.bind(path)
+    finally:
+        os.umask(umask)
+    listener.listen()
+    print(f"👂 Listening on {path} (Ctrl-C to stop)")
+    
+    try:
+        while True:
+            connection, _ = listener.accept()
+            with connection:
+                _handle(connection)
+    except KeyboardInterrupt:
+        print("\n👋 Render daemon stopped")
+    finally:
+        listener.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+
+def running(path=None):
+    """Whether a daemon is accepting requests on path"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with probe:
+        try:
+            probe.connect(path or socket_path())
+        except OSError:
+            return False
+    return True
+
+
+def _handle(connection):
+    """Run one forwarded request, streaming its output back over connection"""
+    if _peer_uid(connection) not in (None, os.getuid()):
+        return
+    with connection.makefile('rb') as requests:
+        line = requests.readline()
+    if not line:
+        # running() probing, or a client that gave up
+        return
+    request = json.loads(line)
+    program = request['program']
+    started = time.perf_counter()
+    
+    try:
+        with _client_session(connection, request):
+            code = _run(program, request['argv'])
+    except OSError as e:
+        # Mostly the client going away (Ctrl-C): its render stops with it
+        print(f"⚠️  {program}: {e}")
+        return
+    
+    with contextlib.suppress(OSError):
+        connection.sendall(json.dumps({'exit': code}).encode() + b'\n')
+    status = '✅' if code == 0 else f'❌ exit {code}'
+    print(f"{status} {program} {' '.join(request['argv'])} ({time.perf_counter() - started:.2f}s)")
+
+
+def _run(program, argv):
+    """program.main(argv) as its own process would run it; returns the exit code"""
+    if program not in PROGRAMS:
+        print(f"❌ Unknown program: {program}. Use {', '.join(PROGRAMS)}", file=sys.stderr)
+        return 2
+    try:
+        importlib.import_module(program).main([*argv, '--no-daemon'])
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+@contextlib.contextmanager
+def _client_session(connection, request):
+    """Give a request the client's directory, environment and console, then take them back
+    
+    Cache settings that CLI flags or the environment switch on for one run
+    are put back to the daemon's own afterwards, like a process exiting.
+    """
+    import layers
+    import profiling
+    import result_cache
+    
+    cwd = os.getcwd()
+    env = dict(os.environ)
+    streams = sys.stdin, sys.stdout, sys.stderr
+    try:
+        os.chdir(request['cwd'])
+        # The daemon's environment, with the client's settings in place of its own
+        os.environ.clear()
+        os.environ.update({name: value for name, value in env.items() if not _forwarded(name)})
+        os.environ.update(forwarded_env(request['env']))
+        _configure_caches(layers, result_cache)
+        sys.stdin = io.StringIO()
+        sys.stdout = _ClientStream(connection, 'out')
+        sys.stderr = _ClientStream(connection, 'err')
+        yield
+    finally:
+        sys.stdin, sys.stdout, sys.stderr = streams
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(env)
+        _configure_caches(layers, result_cache)
+        profiling.profiler.disable()
+        profiling.profiler.drain()
+
+
+def _configure_caches(layers, result_cache):
+    """Disk caches on or off as a process started with this os.environ would have them"""
+    layers.cache.disk_dir = None
+    result_cache.cache.directory = None
+    if os.environ.get(layers.CACHE_DIR_ENV):
+        layers.cache.enable_disk(os.environ[layers.CACHE_DIR_ENV])
+    if os.environ.get(result_cache.CACHE_DIR_ENV):
+        max_mb = int(os.environ.get(result_cache.CACHE_MB_ENV) or result_cache.DEFAULT_MAX_MB)
+        result_cache.cache.enable(os.environ[result_cache.CACHE_DIR_ENV], max_mb * 2**20)
+
+
+class _ClientStream(io.TextIOBase):
+    """Text stream that sends what is written to the client, tagged out or err"""
+    
+    # Export threads may write while the render thread does
+    _lock = threading.Lock()
+    
+    def __init__(self, connection, name):
+        self.connection = connection
+        self.name = name
+    
+    def writable(self):
+        return True
+    
+    def write(self, text):
+        if text:
+            message = json.dumps({'stream': self.name, 'text': text}).encode() + b'\n'
+            with self._lock:
+                self.connection.sendall(message)
+        return len(text)
+
+
+class _ClientHandler(logging.StreamHandler):
+    """Logs to sys.stdout as it is when the record arrives: the client being served"""
+    
+    @property
+    def stream(self):
+        return sys.stdout
+    
+    @stream.setter
+    def stream(self, value):
+        pass
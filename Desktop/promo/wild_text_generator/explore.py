@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+SEED EXPLORER
+Renders a grid of seeds as thumbnails on one contact sheet, labelled by seed
+Thumbnails are drawn at thumbnail size with the same picture as the full render
+"""
+
+import argparse
+import logging
+import math
+import sys
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+import batch
+import fonts
+import profiling
+import styles
+from wild_generator import PARTICLE_DENSITIES, WildTextGenerator
+
+LABEL_HEIGHT = 24
+GAP = 8
+
+
+def _render_thumbnail_job(job):
+    """--workers task: render one thumbnail inside a pool worker"""
+    text, style, seed, density = job
+    return batch.call_worker('render', {
+        'text': text, 'style': style, 'seed': seed, 'density': density})
+
+
+@profiling.stage
+def contact_sheet(thumbnails, seeds, columns):
+    """Tile thumbnails into a grid with each seed printed under its cell"""
+    if not thumbnails:
+        raise ValueError("A contact sheet needs at least one thumbnail")
+    thumb_width, thumb_height = thumbnails[0].size
+    rows = math.ceil(len(thumbnails) / columns)
+    cell_width = thumb_width + GAP
+    cell_height = thumb_height + LABEL_HEIGHT + GAP
+    
+    sheet = Image.new('RGB', (columns * cell_width + GAP, rows * cell_height + GAP), (20, 20, 20))
+    draw = ImageDraw.Draw(sheet)
+    label_font = fonts.registry.regular(LABEL_HEIGHT * 2 // 3)
+    
+    for i, (thumbnail, seed) in enumerate(zip(thumbnails, seeds)):
+        x = GAP + (i % columns) * cell_width
+        y = GAP + (i // columns) * cell_height
+        sheet.paste(thumbnail, (x, y))
+        
+        label = f"seed {seed}"
+        label_bbox = draw.textbbox((0, 0), label, font=label_font)
+        label_width = label_bbox[2] - label_bbox[0]
+        draw.text((x + (thumb_width - label_width) // 2, y + thumb_height + 2), label,
+                  fill=(200, 200, 200), font=label_font)
+    
+    return sheet
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='🔎 SEED EXPLORER - Compare many seeds on one contact sheet',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 explore.py --text "NEXT LEVEL" --style liquid
+  python3 explore.py --text "GENIUS" --style holographic --count 100 --seed 1000
+  python3 explore.py --text "VIBES" --width 1080 --height 1350 --thumb-width 160
+        """
+    )
+    
+    parser.add_argument('--text', required=True, help='Text to render')
+    parser.add_argument('--style', default='particle', choices=styles.names(),
+                        help='Visual style (default: particle)')
+    parser.add_argument('--count', type=int, default=64, help='Number of seeds on the sheet (default: 64)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='First seed; the sheet shows seed, seed+1, ... (default: random seeds)')
+    parser.add_argument('--width', type=int, default=1080, help='Full render width (default: 1080)')
+    parser.add_argument('--height', type=int, default=1080, help='Full render height (default: 1080)')
+    parser.add_argument('--thumb-width', type=int, default=200, help='Thumbnail width (default: 200)')
+    parser.add_argument('--columns', type=int, default=None, help='Grid columns (default: square-ish)')
+    parser.add_argument('--density', default='standard', choices=list(PARTICLE_DENSITIES),
+                        help='Particle density preset for the particle style (default: standard)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Render thumbnails in N parallel processes (default: 1)')
+    parser.add_argument('--output', help='Sheet path (default: output/<text>_<style>_explore.png)')
+    parser.add_argument('--profile', metavar='OUT.json',
+                        help='Write per-stage wall time, CPU time and allocations to this JSON file')
+    
+    args = parser.parse_args()
+    if args.count < 1:
+        parser.error("--count must be at least 1")
+    if args.columns is not None and args.columns < 1:
+        parser.error("--columns must be at least 1")
+    
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    if args.profile:
+        profiling.profiler.enable()
+    
+    print("🔎 SEED EXPLORER 🔎")
+    print(f"Text: '{args.text}'")
+    print(f"Style: {args.style}")
+    print(f"Seeds: {args.count}")
+    print("=" * 50)
+    
+    # One thumbnail generator renders every seed, so the font, text mask and
+    # seed-independent layers are built once for the whole sheet
+    generator = WildTextGenerator(width=args.width, height=args.height)
+    thumb_kwargs = generator.preview_kwargs(args.thumb_width / args.width)
+    seeds = batch.batch_seeds(args.seed, args.count)
+    jobs = [(args.text, args.style, seed, args.density) for seed in seeds]
+    
+    if args.workers > 1:
+        print(f"⚡ Rendering on {args.workers} workers")
+        thumbnails = batch.run_parallel(_render_thumbnail_job, jobs, args.workers,
+                                        WildTextGenerator, thumb_kwargs)
+    else:
+        # Per-seed style chatter would drown the sheet summary
+        logging.getLogger('wild_generator').setLevel(logging.WARNING)
+        thumbnailer = generator.preview(args.thumb_width / args.width)
+        thumbnails = [thumbnailer.render(text, style, seed, density=density)
+                      for text, style, seed, density in jobs]
+    
+    columns = args.columns or math.ceil(math.sqrt(len(seeds)))
+    sheet = contact_sheet(thumbnails, seeds, columns)
+    
+    if args.output:
+        output_path = Path(args.output)
+    else:
+        safe_text = args.text.replace(' ', '_').replace('/', '_')[:20]
+        generator.output_dir.mkdir(exist_ok=True)
+        output_path = generator.output_dir / f"{safe_text}_{args.style}_explore.png"
+    sheet.save(output_path, 'PNG')
+    
+    print(f"🖼️  Sheet: {output_path} ({thumb_kwargs['width']}x{thumb_kwargs['height']} thumbnails, "
+          f"{columns} columns)")
+    print("💡 Render a seed at full size: python3 wild_generator.py --text "
+          f"\"{args.text}\" --style {args.style} --seed <seed>")
+    if args.profile:
+        profiling.profiler.write(args.profile)
+        print(f"⏱️  Profile: {args.profile}")
+    print("=" * 50)
+
+
+if __name__ == '__main__':
+    main()
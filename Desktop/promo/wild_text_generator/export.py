@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+EXPORT
+Derives every requested size from one render and writes PNG, WebP or JPEG
+Encoding and disk writes run on background threads while the next render starts
+"""
+
+import argparse
+import struct
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import profiling
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+FORMATS = {'png': 'PNG', 'webp': 'WEBP', 'jpeg': 'JPEG'}
+EXTENSIONS = {'png': '.png', 'webp': '.webp', 'jpeg': '.jpg'}
+
+
+def parse_size(size):
+    """'1080' -> (1080, 1080), '1080x1350' -> (1080, 1350); ValueError for anything else"""
+    width, _, height = str(size).partition('x')
+    try:
+        width, height = int(width), int(height or width)
+    except ValueError:
+        width = height = 0
+    if width < 1 or height < 1:
+        raise ValueError(f"Size must be N or WxH in whole pixels, e.g. 1080 or 1080x1350, not '{size}'")
+    return width, height
+
+
+def size_type(size):
+    """parse_size() as an argparse type, so bad sizes are usage errors"""
+    try:
+        return parse_size(size)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def covering_size(sizes):
+    """Smallest canvas every size can be cut from at its own aspect ratio"""
+    return max(width for width, _ in sizes), max(height for _, height in sizes)
+
+
+def crop_box(source_size, size):
+    """Largest centred box of source_size with the aspect ratio of size"""
+    source_width, source_height = source_size
+    width, height = size
+    crop_width = min(source_width, round(source_height * width / height))
+    crop_height = min(source_height, round(source_width * height / width))
+    left = (source_width - crop_width) // 2
+    top = (source_height - crop_height) // 2
+    return (left, top, left + crop_width, top + crop_height)
+
+
+def shrink(source_size, size):
+    """Factor derive() scales size's crop of a source_size image by (1 = no scaling)"""
+    left, _, right, _ = crop_box(source_size, size)
+    return size[0] / (right - left)
+
+
+def derive(image, size):
+    """Cut size's aspect ratio out of the centre of image and scale it to size"""
+    size = tuple(size)
+    if image.size == size:
+        return image
+    box = crop_box(image.size, size)
+    if (box[2] - box[0], box[3] - box[1]) == size:
+        return image.crop(box)
+    return image.resize(size, Image.LANCZOS, box=box)
+
+
+def output_path(stem, fmt, size=None):
+    """stem_WxH.ext, or stem.ext without a size"""
+    suffix = f"_{size[0]}x{size[1]}" if size else ''
+    return Path(f"{stem}{suffix}{EXTENSIONS[fmt]}")
+
+
+def targets(stem, sizes, formats, sized=True):
+    """(size, fmt, path) of every file save_all() writes for these sizes and formats"""
+    return [(tuple(size), fmt, output_path(stem, fmt, tuple(size) if sized else None))
+            for size in sizes for fmt in formats]
+
+
+class Exporter:
+    """Writes images in any export format on a small pool of background threads
+    
+    PNG uses compress_level (0-9, Pillow's default is 6); WebP and JPEG use
+    quality. With workers=0 every save happens inline, e.g. inside pool
+    workers that already run in parallel. At most two images per thread
+    wait to be encoded; save() blocks beyond that, so memory stays bounded.
+    """
+    
+    def __init__(self, workers=2, compress_level=6, quality=90):
+        if not 0 <= compress_level <= 9:
+            raise ValueError(f"PNG compress level must be 0-9, not {compress_level}")
+        self.compress_level = compress_level
+        self.quality = quality
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export') if workers else None
+        self.pending = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, workers) * 2)
+    
+    def options(self, fmt):
+        """Pillow save() arguments for a format"""
+        if fmt == 'png':
+            return {'compress_level': self.compress_level}
+        if fmt == 'webp':
+            return {'quality': self.quality, 'method': 4}
+        if fmt == 'jpeg':
+            return {'quality': self.quality, 'optimize': True}
+        raise ValueError(f"Unknown export format: {fmt}. Use {', '.join(FORMATS)}")
+    
+    def save(self, image, path, fmt='png', on_written=None):
+        """Queue image to be written to path; returns a Future of the path
+        
+        The image must not be changed after it is handed over. on_written(path)
+        is called on the writing thread once the file is complete.
+        """
+        options = self.options(fmt)
+        if self.pool is None:
+            future = Future()
+            future.set_result(self._write(image, path, fmt, options, on_written))
+        else:
+            self._slots.acquire()
+            future = self.pool.submit(self._write, image, path, fmt, options, on_written)
+            future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            self.pending.append(future)
+        return future
+    
+    def save_all(self, images, stem, formats, sized=True, on_written=None):
+        """Write every image of {size: image} in every format; returns the paths"""
+        paths = []
+        for size, fmt, path in targets(stem, images, formats, sized):
+            self.save(images[size], path, fmt, on_written)
+            paths.append(path)
+        return paths
+    
+    def wait(self):
+        """Block until everything queued so far is on disk; re-raises write errors"""
+        with self._lock:
+            pending, self.pending = self.pending, []
+        return [future.result() for future in pending]
+    
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _write(self, image, path, fmt, options, on_written=None):
+        with profiling.span('export.write', format=fmt, width=image.width, height=image.height):
+            if fmt == 'jpeg' and image.mode != 'RGB':
+                image = image.convert('RGB')
+            image.save(path, FORMATS[fmt], **options)
+        if on_written:
+            on_written(path)
+        return path
+
+
+class PNGStream:
+    """Writes an RGB PNG a band of rows at a time, top to bottom
+    
+    For images too big to hold whole, e.g. print posters. Rows are Paeth
+    filtered and deflated as they arrive; compress_level is zlib's 0-9.
+    Use as a context manager; a file left unfinished by an error is removed.
+    """
+    
+    SIGNATURE = b'\x89PNG\r\n\x1a\n'
+    
+    def __init__(self, path, width, height, compress_level=6):
+        if not 0 <= compress_level <= 9:
+            raise ValueError(f"PNG compress level must be 0-9, not {compress_level}")
+        self.path = Path(path)
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._deflate = zlib.compressobj(compress_level)
+        self._previous = np.zeros((1, width * 3), dtype=np.uint8)
+        self.file = open(self.path, 'wb')
+        self.file.write(self.SIGNATURE)
+        # 8-bit RGB, no interlacing
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+    
+    def write(self, rows):
+        """Append (n, width, 3) uint8 rows"""
+        if rows.shape[1:] != (self.width, 3):
+            raise ValueError(f"Rows must be {self.width} pixels of RGB, not {rows.shape[1:]}")
+        if self.rows_written + len(rows) > self.height:
+            raise ValueError(f"More than {self.height} rows written")
+        
+        with profiling.span('export.png_rows', rows=len(rows)):
+            flat = rows.reshape(len(rows), -1)
+            for top in range(0, len(flat), 64):
+                band = flat[top:top + 64]
+                filtered = np.empty((len(band), 1 + band.shape[1]), dtype=np.uint8)
+                filtered[:, 0] = 4
+                filtered[:, 1:] = _paeth(band, self._previous)
+                self._previous = band[-1:].copy()
+                self._idat(self._deflate.compress(filtered))
+            self.rows_written += len(rows)
+    
+    def close(self):
+        if self.file.closed:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"PNG got {self.rows_written} of {self.height} rows")
+            self._idat(self._deflate.flush())
+            self._chunk(b'IEND', b'')
+        finally:
+            self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, *exc):
+        try:
+            if exc_type is None:
+                self.close()
+        finally:
+            if exc_type is not None or self.rows_written != self.height:
+                self.file.close()
+                self.path.unlink(missing_ok=True)
+    
+    def _idat(self, data):
+        if data:
+            self._chunk(b'IDAT', data)
+    
+    def _chunk(self, kind, data):
+        self.file.write(struct.pack('>I', len(data)))
+        self.file.write(kind)
+        self.file.write(data)
+        self.file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+
+def _paeth(rows, previous):
+    """PNG Paeth filter of (n, row bytes) uint8 rows following the row previous"""
+    up = np.concatenate([previous, rows[:-1]]).astype(np.int16)
+    current = rows.astype(np.int16)
+    # Left neighbours are the same channel one pixel (3 bytes) back
+    left = np.zeros_like(current)
+    left[:, 3:] = current[:, :-3]
+    up_left = np.zeros_like(up)
+    up_left[:, 3:] = up[:, :-3]
+    
+    to_left = np.abs(up - up_left)
+    to_up = np.abs(left - up_left)
+    to_up_left = np.abs(left + up - 2 * up_left)
+    predicted = np.where((to_left <= to_up) & (to_left <= to_up_left), left,
+                         np.where(to_up <= to_up_left, up, up_left))
+    return (current - predicted).astype(np.uint8)
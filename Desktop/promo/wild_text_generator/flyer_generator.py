@@ -5,117 +5,347 @@ Production-ready system for promoters to create custom party flyers
 Each party gets unique branding with the same wild aesthetic
 """
 
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
 import argparse
 import random
 import json
+import logging
+import os
+import sys
 from pathlib import Path
 from datetime import datetime
 from wild_generator import WildTextGenerator
+import batch
+import compositing
+import daemon
+import export
+import fonts
+import layers
+import profiling
+import result_cache
+import styles
+from cache import LRUCache
+from lazy import lazy_import
+
+Image = lazy_import('PIL.Image')
+ImageDraw = lazy_import('PIL.ImageDraw')
+
+logger = logging.getLogger('flyer_generator')
+
+
+def _image_bytes(value):
+    """Bytes held by an image, an (image, ...) tuple or a {key: image} dict"""
+    if isinstance(value, dict):
+        return sum(map(_image_bytes, value.values()))
+    if isinstance(value, tuple):
+        value = value[0]
+    return value.width * value.height * len(value.getbands())
+
+
+# Recent headline renders and info text layers: a flyer whose details change
+# (a venue typo, one more DJ) reuses its headline and only redraws the text
+headline_layers = LRUCache(max_bytes=256 * 2**20, sizeof=_image_bytes)
+info_layers = LRUCache(max_bytes=64 * 2**20, sizeof=_image_bytes)
 
 class PartyFlyerGenerator:
-    def __init__(self, width=1080, height=1350):
-        """Instagram Story dimensions by default"""
+    def __init__(self, width=1080, height=1350, scale=1.0, quality='max'):
+        """Instagram Story dimensions by default; scale < 1 makes quick previews
+        
+        quality is the headline's blur tier (see compositing.QUALITIES).
+        """
         self.width = width
         self.height = height
-        self.text_gen = WildTextGenerator(width, height)
+        self.scale = scale
+        self.quality = quality
+        self.canvas_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        self.text_gen = WildTextGenerator(width, height, quality=quality)
+        self._sized = {}
+        # Made by the first save, not here: servers never write to them
         self.output_dir = Path("flyers")
-        self.output_dir.mkdir(exist_ok=True)
         self.templates_dir = Path("templates")
-        self.templates_dir.mkdir(exist_ok=True)
-        
+    
     def load_party_config(self, config_path):
         """Load party configuration from JSON"""
         with open(config_path, 'r') as f:
             return json.load(f)
     
+    @profiling.stage
     def create_party_flyer(self, party_name, headline, date, venue, style='particle', 
-                          seed=None, lineup=None, bottom_text=None):
-        """Generate complete party flyer with all info"""
-        print(f"🎉 Creating flyer for: {party_name}")
+                          seed=None, lineup=None, bottom_text=None, exporter=None):
+        """Generate complete party flyer with all info
+        
+        With an exporter (see export.py) the PNG is written on its background
+        threads and this returns as soon as the flyer is drawn.
+        """
+        logger.info(f"🎉 Creating flyer for: {party_name}")
         
         if seed is None:
             seed = random.randint(0, 999999)
         
-        # Generate main headline visual
-        headline_img = self.text_gen.generate(headline, style, seed, output_path=None)[0]
+        output_path = export.output_path(self.output_stem(party_name, seed), 'png')
+        key = self.result_key(party_name, headline, date, venue, style, seed, lineup, bottom_text,
+                              'png', (exporter or export.Exporter(workers=0)).options('png'))
+        cached = result_cache.cached_export([((self.width, self.height), 'png', output_path)],
+                                            {output_path: key})
+        if cached:
+            logger.info(f"♻️  Cached flyer: {output_path}")
+            return cached[(self.width, self.height)], output_path, seed
+        
+        flyer = self.render_flyer(party_name, headline, date, venue, style=style,
+                                  seed=seed, lineup=lineup, bottom_text=bottom_text)
+        
+        # Save flyer
+        if exporter is None:
+            with profiling.span('save_png'):
+                flyer.save(output_path, 'PNG')
+            result_cache.cache.store(key, 'png', output_path)
+        else:
+            exporter.save(flyer, output_path, 'png',
+                          on_written=lambda path: result_cache.cache.store(key, 'png', path))
         
-        # Create full flyer canvas
-        flyer = Image.new('RGB', (self.width, self.height), (0, 0, 0))
+        logger.info(f"✅ Flyer saved: {output_path}")
+        return flyer, output_path, seed
+    
+    @profiling.stage
+    def export_flyer(self, party_name, headline, date, venue, style, seed, sizes=None,
+                     formats=('png',), exporter=None, lineup=None, bottom_text=None):
+        """Flyers in every size and format from one headline render
         
-        # Paste headline in upper portion
-        headline_resized = headline_img.resize((self.width, int(self.height * 0.4)))
-        flyer.paste(headline_resized, (0, 50))
+        sizes defaults to this canvas, saved under create_party_flyer()'s file
+        name; explicit sizes are named with the style and a _WxH suffix. Returns ({size: flyer}, paths).
+        """
+        logger.info(f"🎉 Creating flyer for: {party_name}")
+        exporter = exporter or export.Exporter(workers=0)
+        # Sized exports name the style: runs of several styles write side by side
+        stem = self.output_stem(party_name, seed, style if sizes is not None else None)
+        targets = export.targets(stem, sizes or [(self.width, self.height)], formats,
+                                 sized=sizes is not None)
+        keys = {path: self.result_key(party_name, headline, date, venue, style, seed, lineup,
+                                      bottom_text, fmt, exporter.options(fmt), size)
+                for size, fmt, path in targets}
+        flyers = result_cache.cached_export(targets, keys)
+        if flyers is not None:
+            paths = [path for _, _, path in targets]
+            for path in paths:
+                logger.info(f"♻️  Cached flyer: {path}")
+            return flyers, paths
         
-        # Add party details
+        headlines = self.render_headlines(headline, style, seed, sizes or [(self.width, self.height)])
+        flyers = {size: self.at_size(*size).compose_flyer(headline_img, party_name, date, venue,
+                                                          lineup, bottom_text)
+                  for size, headline_img in headlines.items()}
+        fmts = {path: fmt for _, fmt, path in targets}
+        
+        def store(path):
+            result_cache.cache.store(keys[path], fmts[path], path)
+        
+        paths = exporter.save_all(flyers, stem, formats, sized=sizes is not None, on_written=store)
+        for path in paths:
+            logger.info(f"✅ Flyer saved: {path}")
+        return flyers, paths
+    
+    def result_key(self, party_name, headline, date, venue, style, seed, lineup, bottom_text,
+                   fmt, options, size=None):
+        """Result cache key (see result_cache.py) of a saved flyer of this generator"""
+        return result_cache.result_key(
+            kind='flyer', party_name=party_name, headline=headline, date=date, venue=venue,
+            style=style, seed=seed, lineup=lineup, bottom_text=bottom_text, format=fmt,
+            options=options, size=list(size or (self.width, self.height)),
+            canvas=[self.width, self.height], scale=self.scale, quality=self.quality,
+            fonts=[fonts.registry.find(fonts.BOLD_FONTS), fonts.registry.find(fonts.REGULAR_FONTS)])
+    
+    def output_stem(self, party_name, seed, style=None):
+        """Output path of a flyer, without extension; style, if given, goes into the name"""
+        safe_name = party_name.replace(' ', '_').replace('/', '_')
+        if style:
+            safe_name = f"{safe_name}_{style}"
+        suffix = '_preview' if self.scale != 1 else ''
+        if self.quality != 'max':
+            suffix = f"_{self.quality}{suffix}"
+        self.output_dir.mkdir(exist_ok=True)
+        return self.output_dir / f"{safe_name}_flyer_seed{seed}{suffix}"
+    
+    @profiling.stage
+    def render_flyer(self, party_name, headline, date, venue, style, seed,
+                     lineup=None, bottom_text=None):
+        """Render a flyer in memory and return the image without saving it"""
+        headline_img = self.render_headline(headline, style, seed)
+        return self.compose_flyer(headline_img, party_name, date, venue, lineup, bottom_text)
+    
+    def headline_size(self):
+        """Size of the headline slot, in design pixels"""
+        return (self.width, int(self.height * 0.4))
+    
+    @profiling.stage
+    def render_headline(self, headline, style, seed):
+        """Main headline visual, rendered straight at its slot size, in memory
+        
+        Read-only: it is kept for the next flyer with the same headline.
+        """
+        def render():
+            headline_gen = self.text_gen.at_size(*self.headline_size()).preview(self.scale)
+            return {None: headline_gen.render(headline, style, seed)}
+        
+        return self._headline_layers(self.headline_key(headline, style, seed), [None], render)[None]
+    
+    @profiling.stage
+    def render_headlines(self, headline, style, seed, sizes):
+        """Headlines for flyers of every (width, height) in sizes, cut from one render
+        
+        Read-only, like render_headline()'s.
+        """
+        sizes = list(dict.fromkeys(tuple(size) for size in sizes))
+        
+        def render():
+            slots = {size: self.at_size(*size).headline_size() for size in sizes}
+            # Each headline's text is never larger than its own flyer would draw it
+            font_scales = {}
+            for (width, height), slot in slots.items():
+                font_scale = min(slot[0] / width, slot[1] / height)
+                font_scales[slot] = min(font_scale, font_scales.get(slot, font_scale))
+            
+            images = self.text_gen.render_sizes(headline, style, seed, list(slots.values()),
+                                                font_scales=font_scales, scale=self.scale)
+            return {size: images[slot] for size, slot in slots.items()}
+        
+        return self._headline_layers(self.headline_key(headline, style, seed, sizes), sizes, render)
+    
+    def estimate_headlines(self, style, sizes=None):
+        """Estimated seconds of render_headlines() for sizes, or render_headline()"""
+        slots = [self.at_size(*size).headline_size() for size in sizes] if sizes else [self.headline_size()]
+        width, height = export.covering_size(slots)
+        return styles.estimate(style, width * self.scale, height * self.scale)
+    
+    def headline_key(self, headline, style, seed, sizes=None):
+        """Cache key of render_headline(), or of render_headlines() for sizes"""
+        return result_cache.result_key(
+            kind='headline', headline=headline, style=style, seed=seed,
+            sizes=sizes and [list(size) for size in sizes], canvas=[self.width, self.height],
+            scale=self.scale, quality=self.quality, font=fonts.registry.find(fonts.BOLD_FONTS))
+    
+    def _headline_layers(self, key, sizes, render):
+        """{size: headline} from memory, else the result cache, else render()"""
+        def load():
+            keys = {size: result_cache.result_key(headline=key, size=size) for size in sizes}
+            stored = {}
+            for size in sizes:
+                stored[size] = result_cache.load_image(keys[size])
+                if stored[size] is None:
+                    break
+            else:
+                return stored
+            
+            rendered = render()
+            for size, image in rendered.items():
+                result_cache.save_image(keys[size], image)
+            return rendered
+        
+        return headline_layers.get_or_create(key, load)
+    
+    @profiling.stage
+    def compose_flyer(self, headline_img, party_name, date, venue, lineup=None, bottom_text=None):
+        """Flyer around an already rendered headline (shareable between parties)
+        
+        The details are drawn into a layer of their own (see info_layer), so
+        new details over a kept headline only cost their text.
+        """
+        top = self._px(50)
+        info, text_top = self.info_layer(party_name, date, venue, lineup, bottom_text)
+        if text_top >= top + headline_img.height:
+            flyer = info.copy()
+            flyer.paste(headline_img, (0, top))
+            return flyer
+        
+        # Text reaching into the headline blends with it, so it's drawn in place
+        flyer = Image.new('RGB', self.canvas_size, (0, 0, 0))
+        flyer.paste(headline_img, (0, top))
+        self.draw_party_info(flyer, party_name, date, venue, lineup, bottom_text)
+        return flyer
+    
+    def info_layer(self, party_name, date, venue, lineup=None, bottom_text=None):
+        """(layer, top): the details drawn on black, and the first row they touch
+        
+        Read-only and kept for reuse. Drawn on black, the text is the same
+        as drawing it onto the flyer wherever the flyer is still black.
+        """
+        key = (self.canvas_size, self.scale, party_name, date, venue, tuple(lineup or ()),
+               tuple(bottom_text or ()), fonts.registry.find(fonts.BOLD_FONTS),
+               fonts.registry.find(fonts.REGULAR_FONTS))
+        
+        def draw():
+            layer = Image.new('RGB', self.canvas_size, (0, 0, 0))
+            self.draw_party_info(layer, party_name, date, venue, lineup, bottom_text)
+            bbox = layer.getbbox()
+            return layer, bbox[1] if bbox else self.canvas_size[1]
+        
+        return info_layers.get_or_create(key, draw)
+    
+    @profiling.stage
+    def draw_party_info(self, flyer, party_name, date, venue, lineup=None, bottom_text=None):
+        """Lay out the party name, date, venue, lineup and bottom text"""
         draw = ImageDraw.Draw(flyer)
+        for text, font, fill, xy in self.party_info_layout(flyer.size, party_name, date, venue,
+                                                            lineup, bottom_text):
+            draw.text(xy, text, fill=fill, font=font)
+    
+    def party_info_layout(self, size, party_name, date, venue, lineup=None, bottom_text=None):
+        """(text, font, fill, (x, y)) of every line draw_party_info() draws on a size canvas
+        
+        The details flow down from mid-canvas and the bottom text sits at the
+        foot. Spacing is designed for 1080x1350; where the details don't fit
+        above the bottom text (wide or square canvases, long lineups) their
+        spacing and fonts shrink until they do.
+        """
+        width, height = size
+        px = self._px
         
-        # Try to load fonts
-        try:
-            title_font = ImageFont.truetype('/System/Library/Fonts/Supplemental/Arial Bold.ttf', 60)
-            info_font = ImageFont.truetype('/System/Library/Fonts/Supplemental/Arial Bold.ttf', 40)
-            detail_font = ImageFont.truetype('/System/Library/Fonts/Helvetica.ttc', 35)
-            small_font = ImageFont.truetype('/System/Library/Fonts/Helvetica.ttc', 28)
-        except:
-            title_font = info_font = detail_font = small_font = ImageFont.load_default()
-        
-        # Party name
-        y_pos = int(self.height * 0.5)
-        name_bbox = draw.textbbox((0, 0), party_name, font=title_font)
-        name_width = name_bbox[2] - name_bbox[0]
-        draw.text(((self.width - name_width) // 2, y_pos), party_name, 
-                 fill=(255, 255, 255), font=title_font)
-        
-        # Date and venue
-        y_pos += 100
-        date_text = f"{date}"
-        date_bbox = draw.textbbox((0, 0), date_text, font=info_font)
-        date_width = date_bbox[2] - date_bbox[0]
-        draw.text(((self.width - date_width) // 2, y_pos), date_text,
-                 fill=(200, 200, 255), font=info_font)
-        
-        y_pos += 80
-        venue_bbox = draw.textbbox((0, 0), venue, font=detail_font)
-        venue_width = venue_bbox[2] - venue_bbox[0]
-        draw.text(((self.width - venue_width) // 2, y_pos), venue,
-                 fill=(180, 180, 180), font=detail_font)
-        
-        # Lineup if provided
+        # (text, bold, design font size, colour, design gap above)
+        flow = [(party_name, True, 60, (255, 255, 255), 0),
+                (f"{date}", True, 40, (200, 200, 255), 100),
+                (venue, False, 35, (180, 180, 180), 80)]
         if lineup:
-            y_pos += 100
-            lineup_title = "LINEUP"
-            title_bbox = draw.textbbox((0, 0), lineup_title, font=info_font)
-            title_width = title_bbox[2] - title_bbox[0]
-            draw.text(((self.width - title_width) // 2, y_pos), lineup_title,
-                     fill=(255, 255, 255), font=info_font)
-            
-            y_pos += 70
-            for artist in lineup:
-                artist_bbox = draw.textbbox((0, 0), artist, font=detail_font)
-                artist_width = artist_bbox[2] - artist_bbox[0]
-                draw.text(((self.width - artist_width) // 2, y_pos), artist,
-                         fill=(200, 200, 200), font=detail_font)
-                y_pos += 50
+            flow.append(("LINEUP", True, 40, (255, 255, 255), 100))
+            flow += [(artist, False, 35, (200, 200, 200), 70 if i == 0 else 50)
+                     for i, artist in enumerate(lineup)]
         
         # Bottom text (tickets, website, etc)
-        if bottom_text:
-            bottom_y = self.height - 120
-            for text in bottom_text:
-                text_bbox = draw.textbbox((0, 0), text, font=small_font)
-                text_width = text_bbox[2] - text_bbox[0]
-                draw.text(((self.width - text_width) // 2, bottom_y), text,
-                         fill=(150, 150, 150), font=small_font)
-                bottom_y += 40
+        bottom_top = height - px(120) if bottom_text else height
+        top = int(height * 0.5)
+        needed = sum(px(gap) for *_, gap in flow[1:]) + px(flow[-1][2])
+        fit = min(1.0, (bottom_top - px(20) - top) / needed)
         
-        # Save flyer
-        safe_name = party_name.replace(' ', '_').replace('/', '_')
-        output_path = self.output_dir / f"{safe_name}_flyer_seed{seed}.png"
-        flyer.save(output_path, 'PNG', quality=95)
+        lines = []
+        y_pos = top
+        for i, (text, bold, font_size, fill, gap) in enumerate(flow):
+            y_pos += px(gap * fit) if i else 0
+            font = (fonts.registry.bold if bold else fonts.registry.regular)(px(font_size * fit))
+            lines.append((text, font, fill, (self._centred(text, font, width), y_pos)))
         
-        print(f"✅ Flyer saved: {output_path}")
-        return flyer, output_path, seed
+        small_font = fonts.registry.regular(px(28))
+        for i, text in enumerate(bottom_text or ()):
+            lines.append((text, small_font, (150, 150, 150),
+                          (self._centred(text, small_font, width), bottom_top + i * px(40))))
+        return lines
     
+    @staticmethod
+    def _centred(text, font, width):
+        """x that centres text in font on a canvas width wide"""
+        bbox = font.getbbox(text)
+        return (width - (bbox[2] - bbox[0])) // 2
+    
+    def at_size(self, width, height):
+        """Flyer generator for another canvas size, kept for reuse"""
+        if (width, height) == (self.width, self.height):
+            return self
+        if (width, height) not in self._sized:
+            self._sized[(width, height)] = PartyFlyerGenerator(width, height, scale=self.scale,
+                                                               quality=self.quality)
+        return self._sized[(width, height)]
+    
+    def _px(self, value):
+        """Design pixels to canvas pixels"""
+        return max(1, round(value * self.scale))
+    
+    @profiling.stage
     def save_party_template(self, party_name, style, seed, config_data):
         """Save party config as reusable template"""
         template = {
@@ -127,15 +357,24 @@ class PartyFlyerGenerator:
         }
         
         safe_name = party_name.replace(' ', '_').replace('/', '_')
+        self.templates_dir.mkdir(exist_ok=True)
         template_path = self.templates_dir / f"{safe_name}_template.json"
         
         with open(template_path, 'w') as f:
             json.dump(template, f, indent=2)
         
-        print(f"💾 Template saved: {template_path}")
+        logger.info(f"💾 Template saved: {template_path}")
         return template_path
 
-def main():
+def _render_batch_job(job):
+    """--workers task: render and save one flyer inside a pool worker"""
+    flyer_kwargs, export_options = job
+    # The pool already keeps every core busy, so workers encode inline
+    exporter = export.Exporter(workers=0, **export_options)
+    _, paths = batch.call_worker('export_flyer', dict(flyer_kwargs, exporter=exporter))
+    return paths, flyer_kwargs['seed']
+
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description='🎉 PARTY FLYER GENERATOR - Custom flyers for every event',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -149,6 +388,12 @@ Examples:
   
   # Generate variations
   python3 flyer_generator.py --party "VIBES" --headline "VIBES" --date "DEC 25" --venue "ROOFTOP" --batch 5
+  
+  # Preview 20 variations small, then render the one you pick in full
+  python3 flyer_generator.py --party "VIBES" --headline "VIBES" --date "DEC 25" --venue "ROOFTOP" --batch 20 --preview
+  
+  # Story, feed post and banner from one render, as PNG and WebP
+  python3 flyer_generator.py --party "VIBES" --headline "VIBES" --date "DEC 25" --venue "ROOFTOP" --sizes 1080x1350 1080 1920x1080 --format png webp
         """
     )
     
@@ -156,15 +401,64 @@ Examples:
     parser.add_argument('--headline', required=True, help='Main headline text for visual')
     parser.add_argument('--date', required=True, help='Event date')
     parser.add_argument('--venue', required=True, help='Venue name')
-    parser.add_argument('--style', default='particle', choices=['particle', 'holographic', 'liquid'],
+    parser.add_argument('--style', default='particle', choices=styles.names(),
                        help='Visual style for headline')
     parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducibility')
     parser.add_argument('--lineup', nargs='+', help='Artist lineup')
     parser.add_argument('--info', nargs='+', help='Additional info lines (tickets, website, etc)')
     parser.add_argument('--batch', type=int, default=1, help='Generate multiple variations')
+    parser.add_argument('--sizes', nargs='+', type=export.size_type, metavar='WxH',
+                       help='Export these flyer sizes from one headline render (default: 1080x1350)')
+    parser.add_argument('--format', nargs='+', default=['png'], choices=list(export.FORMATS),
+                       help='Export formats (default: png)')
+    parser.add_argument('--png-compress', type=int, default=6, choices=range(10), metavar='0-9',
+                       help='PNG compression level, 0 = fastest, 9 = smallest (default: 6)')
+    parser.add_argument('--lossy-quality', type=int, default=90,
+                       help='WebP/JPEG quality (default: 90)')
+    parser.add_argument('--quality', default='max', choices=compositing.QUALITIES,
+                       help='Blur quality: max blurs exactly, standard and draft blur big radii '
+                            'downsampled for speed (default: max)')
+    parser.add_argument('--layer-cache', metavar='DIR',
+                       help='Also keep reusable layers (e.g. backgrounds) as .npy files in DIR')
+    parser.add_argument('--result-cache', metavar='DIR',
+                       help='Keep finished files in DIR and copy them instead of re-rendering repeats')
+    parser.add_argument('--result-cache-mb', type=int, default=result_cache.DEFAULT_MAX_MB, metavar='MB',
+                       help=f'Size cap of --result-cache; least recently used files go first '
+                            f'(default: {result_cache.DEFAULT_MAX_MB})')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Render batch variations in N parallel processes')
     parser.add_argument('--save-template', action='store_true', help='Save as reusable template')
+    parser.add_argument('--preview', action='store_true',
+                       help='Render the batch as small previews, then the picked seed at full size')
+    parser.add_argument('--preview-scale', type=float, default=0.25,
+                       help='Preview size as a fraction of the full size (default: 0.25)')
+    parser.add_argument('--profile', metavar='OUT.json',
+                       help='Write per-stage wall time, CPU time and allocations to this JSON file')
+    parser.add_argument('--daemon', action=daemon.ServeAction,
+                       help='Stay resident with everything loaded and render what later runs forward '
+                            'to it over a local socket (Ctrl-C to stop)')
+    parser.add_argument('--no-daemon', action='store_true',
+                       help='Render in this process even if a --daemon is running')
+    
+    argv = sys.argv[1:] if argv is None else argv
+    args = parser.parse_args(argv)
+    
+    # A running --daemon has numpy, fonts and caches warm; --preview asks for input here
+    if not (args.no_daemon or args.preview):
+        code = daemon.forward('flyer_generator', argv)
+        if code is not None:
+            sys.exit(code)
+    
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    if args.profile:
+        profiling.profiler.enable()
     
-    args = parser.parse_args()
+    if args.layer_cache:
+        # Exported too, so pool workers started with spawn find the same cache
+        os.environ[layers.CACHE_DIR_ENV] = args.layer_cache
+        layers.cache.enable_disk(args.layer_cache)
+    if args.result_cache:
+        result_cache.enable_from_args(args.result_cache, args.result_cache_mb)
     
     print("🎉 PARTY FLYER GENERATOR 🎉")
     print(f"Party: {args.party}")
@@ -172,45 +466,88 @@ Examples:
     print(f"Style: {args.style}")
     print("=" * 50)
     
-    generator = PartyFlyerGenerator()
+    generator = PartyFlyerGenerator(quality=args.quality)
+    
+    seeds = batch.batch_seeds(args.seed, args.batch)
+    flyer_kwargs = {
+        'party_name': args.party,
+        'headline': args.headline,
+        'date': args.date,
+        'venue': args.venue,
+        'style': args.style,
+        'lineup': args.lineup,
+        'bottom_text': args.info
+    }
+    
+    sizes = args.sizes
+    export_options = {'compress_level': args.png_compress, 'quality': args.lossy_quality}
+    # Previews are for picking a seed: one PNG each, the pick gets every size and format
+    export_kwargs = {'sizes': None, 'formats': ['png']} if args.preview else {
+        'sizes': sizes, 'formats': args.format}
+    
+    scale = args.preview_scale if args.preview else 1.0
+    if args.preview:
+        width, height = PartyFlyerGenerator(scale=scale, quality=args.quality).canvas_size
+        print(f"👀 Previewing at {width}x{height}")
     
     results = []
-    for i in range(args.batch):
-        print(f"\n[{i+1}/{args.batch}]")
+    if args.workers > 1:
+        print(f"⚡ Rendering on {args.workers} workers")
+        jobs = [(dict(flyer_kwargs, seed=seed, **export_kwargs), export_options) for seed in seeds]
         
-        if args.seed is not None:
-            seed = args.seed + i
-        else:
-            seed = random.randint(0, 999999)
+        def report(done, total, rendered):
+            paths, seed = rendered
+            print(f"[{done}/{total}] ✅ seed {seed} → {', '.join(map(str, paths))}")
         
-        flyer, path, seed = generator.create_party_flyer(
-            party_name=args.party,
-            headline=args.headline,
-            date=args.date,
-            venue=args.venue,
-            style=args.style,
-            seed=seed,
-            lineup=args.lineup,
-            bottom_text=args.info
-        )
-        results.append((flyer, path, seed))
-        
-        # Save template on first iteration if requested
-        if i == 0 and args.save_template:
-            config = {
-                'headline': args.headline,
-                'date': args.date,
-                'venue': args.venue,
-                'lineup': args.lineup,
-                'info': args.info
-            }
-            generator.save_party_template(args.party, args.style, seed, config)
+        rendered = batch.run_parallel(_render_batch_job, jobs, args.workers,
+                                      PartyFlyerGenerator, {'scale': scale, 'quality': args.quality},
+                                      on_done=report)
+        results = [(None, paths, seed) for paths, seed in rendered]
+    else:
+        batch_generator = PartyFlyerGenerator(scale=scale, quality=args.quality) if args.preview else generator
+        # Files are encoded in the background while the next seed renders
+        with export.Exporter(**export_options) as exporter:
+            for i, seed in enumerate(seeds):
+                print(f"\n[{i+1}/{args.batch}]")
+                flyers, paths = batch_generator.export_flyer(seed=seed, exporter=exporter,
+                                                             **flyer_kwargs, **export_kwargs)
+                results.append((flyers, paths, seed))
+    
+    template_seed = seeds[0]
+    if args.preview:
+        # The full render of a seed is exactly what a plain run would produce
+        seed = batch.pick_seed(seeds)
+        if seed is None:
+            print("\n💡 Render your pick at full size with --seed <seed> (without --preview)")
+        else:
+            with export.Exporter(**export_options) as exporter:
+                flyers, paths = generator.export_flyer(seed=seed, sizes=sizes, formats=args.format,
+                                                       exporter=exporter, **flyer_kwargs)
+            results.append((flyers, paths, seed))
+            template_seed = seed
+    
+    # Save template for the first variation (or the picked one) if requested
+    if args.save_template:
+        config = {
+            'headline': args.headline,
+            'date': args.date,
+            'venue': args.venue,
+            'lineup': args.lineup,
+            'info': args.info
+        }
+        generator.save_party_template(args.party, args.style, template_seed, config)
     
     print("\n" + "=" * 50)
     print("🎉 FLYERS COMPLETE!")
-    print(f"Generated {len(results)} flyer(s):")
-    for _, path, seed in results:
-        print(f"  • {path.name} (seed: {seed})")
+    print(f"Generated {sum(len(paths) for _, paths, _ in results)} flyer(s):")
+    for _, paths, seed in results:
+        for path in paths:
+            print(f"  • {path.name} (seed: {seed})")
+    if args.workers == 1:
+        print(f"🔤 Cache: {fonts.format_stats()}")
+    if args.profile:
+        profiling.profiler.write(args.profile)
+        print(f"⏱️  Profile: {args.profile}")
     print("=" * 50)
 
 if __name__ == '__main__':
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+FONT REGISTRY
+Process-wide cache of loaded fonts and rendered text masks
+Loads each font file once per size, no matter how many renders ask for it
+"""
+
+import os
+import threading
+from pathlib import Path
+
+from cache import LRUCache
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+ImageDraw = lazy_import('PIL.ImageDraw')
+ImageFont = lazy_import('PIL.ImageFont')
+
+# Preferred fonts, best first. Absolute paths are macOS system fonts,
+# bare file names are looked up in the fontconfig directories below.
+BOLD_FONTS = [
+    '/System/Library/Fonts/Supplemental/Arial Bold.ttf',
+    '/System/Library/Fonts/Helvetica.ttc',
+    '/Library/Fonts/Arial Bold.ttf',
+    'Arial_Bold.ttf',
+    'arialbd.ttf',
+    'LiberationSans-Bold.ttf',
+    'DejaVuSans-Bold.ttf',
+    'FreeSansBold.ttf',
+]
+
+REGULAR_FONTS = [
+    '/System/Library/Fonts/Helvetica.ttc',
+    'Arial.ttf',
+    'arial.ttf',
+    'LiberationSans-Regular.ttf',
+    'DejaVuSans.ttf',
+    'FreeSans.ttf',
+]
+
+# Where fontconfig looks for fonts on Linux
+FONT_DIRS = [
+    '/usr/share/fonts',
+    '/usr/local/share/fonts',
+    os.path.join(os.environ.get('XDG_DATA_HOME', '~/.local/share'), 'fonts'),
+    '~/.fonts',
+]
+
+DEFAULT_FONT = 'default'
+
+
+class FontRegistry:
+    """Finds, loads and caches fonts and text masks for the whole process"""
+    
+    def __init__(self, max_fonts=32, max_mask_bytes=64 * 1024 * 1024, font_dirs=FONT_DIRS):
+        self.font_dirs = font_dirs
+        self.fonts = LRUCache(maxsize=max_fonts)
+        self.masks = LRUCache(max_bytes=max_mask_bytes)
+        self._index = None
+        self._resolved = {}
+        self._lock = threading.Lock()
+    
+    def find(self, candidates):
+        """Path of the first available font in candidates, or None"""
+        key = tuple(candidates)
+        if key not in self._resolved:
+            self._resolved[key] = next(
+                (path for path in map(self._locate, candidates) if path), None)
+        return self._resolved[key]
+    
+    def load(self, path, size):
+        """Loaded FreeTypeFont for (path, size), falling back to PIL's default"""
+        if path is None or path == DEFAULT_FONT:
+            return self.fonts.get_or_create((DEFAULT_FONT, None), ImageFont.load_default)
+        return self.fonts.get_or_create((path, size), lambda: ImageFont.truetype(path, size))
+    
+    def bold(self, size):
+        return self.load(self.find(BOLD_FONTS), size)
+    
+    def regular(self, size):
+        return self.load(self.find(REGULAR_FONTS), size)
+    
+    def text_mask(self, text, font_size, canvas_size, candidates=BOLD_FONTS):
+        """Read-only uint8 mask of text centred on a canvas of canvas_size"""
+        path = self.find(candidates) or DEFAULT_FONT
+        key = (text, path, font_size, tuple(canvas_size))
+        return self.masks.get_or_create(
+            key, lambda: self._render_mask(text, self.load(path, font_size), canvas_size))
+    
+    def text_rows(self, text, font_size, canvas_size, candidates=BOLD_FONTS):
+        """(top, mask) of just the rows text_mask() would draw text into
+        
+        For canvases too big to hold a whole mask, e.g. print posters. The
+        rows are the same pixels as text_mask()'s and are not cached.
+        """
+        path = self.find(candidates) or DEFAULT_FONT
+        font = self.load(path, font_size)
+        x, y, bbox = _centred(text, font, canvas_size)
+        top = min(max(y + bbox[1], 0), canvas_size[1])
+        bottom = max(min(y + bbox[3], canvas_size[1]), top)
+        return top, self._render_mask(text, font, canvas_size, rows=(top, bottom))
+    
+    def stats(self):
+        return {'fonts': self.fonts.stats(), 'masks': self.masks.stats()}
+    
+    def _render_mask(self, text, font, canvas_size, rows=None):
+        width, height = canvas_size
+        top, bottom = rows or (0, height)
+        mask = Image.new('L', (width, bottom - top), 0)
+        draw = ImageDraw.Draw(mask)
+        
+        # Center text
+        x, y, _ = _centred(text, font, canvas_size)
+        
+        draw.text((x, y - top), text, fill=255, font=font)
+        mask_array = np.array(mask)
+        mask_array.flags.writeable = False
+        return mask_array
+    
+    def _locate(self, name):
+        if os.path.isabs(name):
+            return name if os.path.isfile(name) else None
+        return self._font_index().get(name.lower())
+    
+    def _font_index(self):
+        """File name -> path for every font under the fontconfig directories"""
+        with self._lock:
+            if self._index is None:
+                index = {}
+                for font_dir in self.font_dirs:
+                    root = Path(font_dir).expanduser()
+                    if not root.is_dir():
+                        continue
+                    for path in sorted(root.rglob('*')):
+                        if path.suffix.lower() in ('.ttf', '.ttc', '.otf'):
+                            index.setdefault(path.name.lower(), str(path))
+                self._index = index
+        return self._index
+
+
+def _centred(text, font, canvas_size):
+    """(x, y, bbox): where text is drawn to centre it, and its box from (0, 0)"""
+    width, height = canvas_size
+    bbox = ImageDraw.Draw(Image.new('L', (1, 1))).textbbox((0, 0), text, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    return (width - text_width) // 2, (height - text_height) // 2, bbox
+
+
+registry = FontRegistry()
+
+
+def format_stats(stats=None):
+    """One-line summary of the registry's hit/miss counters"""
+    stats = stats or registry.stats()
+    fonts, masks = stats['fonts'], stats['masks']
+    return (f"fonts {fonts['hits']} hits / {fonts['misses']} misses, "
+            f"text masks {masks['hits']} hits / {masks['misses']} misses "
+            f"({masks['bytes'] / 1e6:.1f} MB)")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+LAYER CACHE
+Keeps render layers that repeat across a batch (backgrounds, scan lines, ramps)
+In-memory LRU tier plus an optional size-capped .npy tier on disk
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from cache import LRUCache
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Bump when a cached layer's algorithm changes so stale .npy files are ignored
+LAYER_VERSION = 1
+
+# Setting this to a directory turns on the disk tier, also for pool workers
+CACHE_DIR_ENV = 'WILD_LAYER_CACHE'
+
+
+def layer_key(style, layer, dims, seed=None):
+    """Cache key for a layer
+    
+    dims lists only the canvas dimensions the layer depends on, e.g.
+    (width, height) or (height,); pass seed only if the layer uses it.
+    """
+    return (style, layer, tuple(dims), seed)
+
+
+class LayerCache:
+    """Two-tier cache of read-only numpy layers"""
+    
+    def __init__(self, max_bytes=128 * 1024 * 1024, disk_dir=None,
+                 disk_max_bytes=1024 * 1024 * 1024):
+        self.memory = LRUCache(max_bytes=max_bytes)
+        self.disk_dir = None
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_hits = 0
+        self.disk_writes = 0
+        if disk_dir:
+            self.enable_disk(disk_dir)
+    
+    def enable_disk(self, disk_dir, max_bytes=None):
+        """Also keep layers as .npy files in disk_dir, capped at max_bytes"""
+        self.disk_dir = Path(disk_dir)
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        if max_bytes is not None:
+            self.disk_max_bytes = max_bytes
+    
+    def get(self, key, factory):
+        """Cached layer for key, building it with factory() on a miss"""
+        layer = self.memory.get(key)
+        if layer is not None:
+            return layer
+        
+        layer = self._load(key) if self.disk_dir else None
+        if layer is None:
+            layer = np.ascontiguousarray(factory())
+            if self.disk_dir:
+                self._save(key, layer)
+        
+        layer.flags.writeable = False
+        return self.memory.put(key, layer)
+    
+    def stats(self):
+        stats = self.memory.stats()
+        stats.update(disk_hits=self.disk_hits, disk_writes=self.disk_writes)
+        return stats
+    
+    def _path(self, key):
+        style, layer, dims, seed = key
+        dims_part = 'x'.join(map(str, dims))
+        seed_part = 'any' if seed is None else f'seed{seed}'
+        return self.disk_dir / f"v{LAYER_VERSION}_{style}_{layer}_{dims_part}_{seed_part}.npy"
+    
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            layer = np.load(path)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        self.disk_hits += 1
+        return layer
+    
+    def _save(self, key, layer):
+        # Write to a temp file and rename so other processes never read a partial layer
+        fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, layer)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            Path(tmp).unlink(missing_ok=True)
+            return
+        self.disk_writes += 1
+        self._trim_disk()
+    
+    def _trim_disk(self):
+        """Delete least recently used .npy files until the tier fits its cap"""
+        files = []
+        for path in self.disk_dir.glob('*.npy'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+cache = LayerCache(disk_dir=os.environ.get(CACHE_DIR_ENV))
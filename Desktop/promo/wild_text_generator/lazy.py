@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+LAZY IMPORTS
+numpy and Pillow take a good 150ms to import - more than --help needs
+Modules bound with lazy_import() load on first attribute access instead
+"""
+
+import importlib
+import sys
+
+
+class _LazyModule:
+    """Stands in for a module until one of its attributes is used
+    
+    The real import goes through importlib.import_module, whose import lock
+    keeps it to one load even when render threads get there together.
+    Attributes are copied over as they are looked up, so later lookups
+    cost the same as on the module itself.
+    """
+    
+    def __init__(self, name):
+        self.__name__ = name
+    
+    def __getattr__(self, attr):
+        value = getattr(importlib.import_module(self.__name__), attr)
+        setattr(self, attr, value)
+        return value
+    
+    def __repr__(self):
+        return f"<lazy module {self.__name__!r}>"
+
+
+def lazy_import(name):
+    """The module called name, or a stand-in that imports it when first used"""
+    return sys.modules.get(name) or _LazyModule(name)
+
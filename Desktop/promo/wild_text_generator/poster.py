@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+POSTER
+Print-size renders (e.g. 7200x10800 for 24x36" at 300 dpi) in bands of rows
+Each band is drawn with enough rows around it for the blurs, then streamed into the PNG
+"""
+
+import math
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import compositing
+import export
+import profiling
+from wild_generator import PARTICLE_DENSITIES, WildTextGenerator, _splat_discs, hsv_to_rgb_array
+
+DEFAULT_BUDGET_MB = 512
+MIN_BAND_ROWS = 16
+# Set aside from the budget for PNG filtering and other chunked temporaries
+OVERHEAD_MB = 32
+
+# Working memory per pixel of a band and the rows around it: numpy frames,
+# Pillow's 4-byte pixels around blurs and the compositing temporaries
+BYTES_PER_PIXEL = {
+    'particle': 24,
+    'holographic': 16,
+    'liquid': 28,
+}
+
+
+def poster_generator(width, height, design_width=1080, quality='max'):
+    """Generator for a width x height print, laid out like a design_width wide render
+    
+    Particles, lines, blurs and glitches keep their size relative to the
+    text, so the poster looks like the social post, only sharper.
+    """
+    if width < design_width:
+        raise ValueError(f"A poster is at least its design width ({design_width} px), not {width}")
+    scale = width / design_width
+    return WildTextGenerator(width, height, font_scale=scale,
+                             design_size=(design_width, max(1, round(height / scale))),
+                             quality=quality)
+
+
+def band_rows(gen, style, budget_mb=DEFAULT_BUDGET_MB, fixed=0):
+    """Rows per band so one band and its context fit in budget_mb, next to fixed bytes"""
+    reach = _reach(gen, style)
+    per_row = gen.width * BYTES_PER_PIXEL[style]
+    rows = (budget_mb * 2**20 - fixed) // per_row - 2 * reach
+    if rows < MIN_BAND_ROWS:
+        need = math.ceil(((MIN_BAND_ROWS + 2 * reach) * per_row + fixed) / 2**20)
+        raise ValueError(f"A {gen.width}x{gen.height} {style} poster needs a budget of "
+                         f"at least {need} MB, not {budget_mb} MB")
+    return min(rows, gen.height)
+
+
+def plan(gen, text, style, budget_mb=DEFAULT_BUDGET_MB, density='standard'):
+    """(text_top, text_rows, rows): the text's rows and the band height render_poster() uses
+    
+    Raises ValueError if budget_mb can't hold a band next to the text and
+    the fixed buffers, so callers can check a budget before rendering.
+    """
+    text_top, text_rows = gen.melted_text_rows(text, font_size=220 if style == 'liquid' else 200)
+    fixed = text_rows.nbytes + OVERHEAD_MB * 2**20
+    if style == 'particle':
+        # Particle arrays: 5 floats each, and their colors
+        fixed += PARTICLE_DENSITIES[density] * 48
+    return text_top, text_rows, band_rows(gen, style, budget_mb, fixed)
+
+
+def _reach(gen, style):
+    """Widest context a band of style needs above and below it"""
+    if style == 'particle':
+        return compositing.blur_reach(5 * gen.scale, gen.quality)
+    if style == 'liquid':
+        return compositing.blur_reach(15 * gen.scale, gen.quality)
+    return 0
+
+
+def _bands(height, rows):
+    for top in range(0, height, rows):
+        yield slice(top, min(top + rows, height))
+
+
+def _mask_rows(gen, text_top, text, rows):
+    """Rows of the text mask, from the strip of rows the text covers"""
+    mask = np.zeros((rows.stop - rows.start, gen.width), dtype=np.uint8)
+    top, bottom = max(rows.start, text_top), min(rows.stop, text_top + len(text))
+    if top < bottom:
+        mask[top - rows.start:bottom - rows.start] = text[top - text_top:bottom - text_top]
+    return mask
+
+
+def render_poster(gen, text, style, seed, path, budget_mb=DEFAULT_BUDGET_MB,
+                  density='standard', compress_level=6):
+    """Render a style band by band straight into a PNG at path
+    
+    Only the text's own rows are kept whole; everything else exists one band
+    (plus context) at a time, sized to budget_mb. Every band is the same as
+    those rows of a full-frame render of gen, so there are no seams. The
+    liquid style mirrors and evens out the whole frame, so it parks its
+    intermediate rows in temporary files next to path.
+    """
+    path = Path(path)
+    text_top, text_rows, rows = plan(gen, text, style, budget_mb, density)
+    
+    with profiling.span('poster', style=style, seed=seed, width=gen.width, height=gen.height,
+                        band_rows=rows):
+        if style == 'particle':
+            bands = particle_bands(gen, text_top, text_rows, seed, rows, density)
+        elif style == 'holographic':
+            bands = holographic_bands(gen, text_top, text_rows, seed, rows)
+        elif style == 'liquid':
+            bands = liquid_bands(gen, text, text_top, text_rows, seed, rows, path.parent)
+        else:
+            raise ValueError(f"Unknown style: {style}. Use 'particle', 'holographic', or 'liquid'")
+        
+        # Each band is deflated on a background thread while the next one renders
+        with export.PNGStream(path, gen.width, gen.height, compress_level) as png, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='poster') as encoder:
+            pending = None
+            for band in bands:
+                if pending is not None:
+                    pending.result()
+                pending = encoder.submit(png.write, band)
+            if pending is not None:
+                pending.result()
+    return path
+
+
+def particle_bands(gen, text_top, text_rows, seed, rows, density='standard'):
+    """Bands of the particle style"""
+    x, y, size, brightness, hue = gen.generate_particle_field(
+        seed, density=PARTICLE_DENSITIES[density])
+    on_text = np.zeros(len(x), dtype=bool)
+    inside = (y >= text_top) & (y < text_top + len(text_rows))
+    on_text[inside] = text_rows[y[inside] - text_top, x[inside]] > 50
+    x, y, size, brightness, hue = (a[on_text] for a in (x, y, size, brightness, hue))
+    
+    colors = np.empty((len(x), 4), dtype=np.uint8)
+    colors[:, :3] = hsv_to_rgb_array(hue, 0.8, brightness) * 255
+    colors[:, 3] = brightness * 255
+    # Discs reaching into a band from the rows around it count too
+    reach = int(np.ceil(size.max() + 0.25)) if len(size) else 0
+    
+    for band in _bands(gen.height, rows):
+        with profiling.span('poster.band', style='particle', top=band.start):
+            mask = _mask_rows(gen, text_top, text_rows, band)
+            frame = np.array(gen.create_energy_field(seed, mask, band))
+            
+            near = (y >= band.start - reach) & (y < band.stop + reach)
+            particles = np.zeros((len(frame), gen.width, 4), dtype=np.uint8)
+            _splat_discs(particles, x[near], y[near] - band.start, size[near], colors[near])
+            compositing.alpha_over(frame, particles[:, :, :3], particles[:, :, 3])
+            del particles
+            
+            compositing.brightness(frame, 1.3)
+            gen.add_chromatic_aberration(frame, strength=round(3 * gen.scale))
+        yield frame
+
+
+def holographic_bands(gen, text_top, text_rows, seed, rows):
+    """Bands of the holographic style; every effect is per row, so no context is needed"""
+    glitches = gen.glitch_lines(seed)
+    scan_alpha = gen.scan_line_alpha(seed)
+    
+    for band in _bands(gen.height, rows):
+        with profiling.span('poster.band', style='holographic', top=band.start):
+            frame = gen._holographic_field(band)
+            gen.add_rgb_split(frame, _mask_rows(gen, text_top, text_rows, band))
+            
+            for top, bottom, offset in glitches:
+                top, bottom = max(top, band.start), min(bottom, band.stop)
+                if top < bottom:
+                    compositing.shift_rows(frame, top - band.start, bottom - band.start, offset)
+            
+            compositing.alpha_over_rows(frame, 255, scan_alpha[band])
+            compositing.saturation(frame, 1.5)
+        yield frame
+
+
+class _RowFile:
+    """Temporary file of (width, 3) uint8 rows, written top to bottom, read back in any slice"""
+    
+    def __init__(self, width, directory=None):
+        self.width = width
+        self.row_bytes = width * 3
+        self.file = tempfile.TemporaryFile(dir=directory, prefix='poster_')
+    
+    def append(self, rows):
+        self.file.write(np.ascontiguousarray(rows).data)
+    
+    def read(self, rows):
+        out = np.empty((rows.stop - rows.start, self.width, 3), dtype=np.uint8)
+        self.file.seek(rows.start * self.row_bytes)
+        self.file.readinto(out.data)
+        return out
+    
+    def close(self):
+        self.file.close()
+
+
+def liquid_bands(gen, text, text_top, text_rows, seed, rows, directory=None):
+    """Bands of the liquid style, in three passes over temporary row files
+    
+    1. background and chrome text; 2. reflection (of the mirrored rows) and
+    glow; 3. contrast, which needs the mean luminance of the finished frame.
+    """
+    height, width = gen.height, gen.width
+    drips = gen.design_drips(text, seed, font_size=220)
+    fade = gen.reflection_fade()
+    glow_radius = 10 * gen.scale
+    glow_reach = compositing.blur_reach(glow_radius, gen.quality)
+    # The glow pass reads its band and the mirror image of it, both with context
+    glow_rows = max(MIN_BAND_ROWS, (rows + 2 * _reach(gen, 'liquid')) // 2 - 2 * glow_reach)
+    
+    composite = _RowFile(width, directory)
+    blended = _RowFile(width, directory)
+    try:
+        for band in _bands(height, rows):
+            with profiling.span('poster.band', style='liquid', top=band.start, stage='composite'):
+                frame = np.array(gen.create_liquid_metal_bg(seed, band))
+                mask = gen.draw_drips(_mask_rows(gen, text_top, text_rows, band), drips, band.start)
+                composite.append(gen.add_chrome(frame, mask, band))
+        
+        luminance = 0
+        for band in _bands(height, glow_rows):
+            with profiling.span('poster.band', style='liquid', top=band.start, stage='glow'):
+                window = gen.blur_window(band, glow_radius)
+                frame = composite.read(window)
+                mirrored = composite.read(slice(height - window.stop, height - window.start))[::-1]
+                
+                # add_reflections on the window's rows
+                reflection = np.empty_like(frame)
+                for top in range(0, len(frame), compositing.BAND_ROWS):
+                    part = slice(top, top + compositing.BAND_ROWS)
+                    reflection[part] = mirrored[part] * fade[window][part, None, None]
+                compositing.blend(frame, reflection, 0.2)
+                del reflection, mirrored
+                
+                crop = slice(band.start - window.start, band.stop - window.start)
+                glow = compositing.gaussian_blur(frame, glow_radius, gen.quality)[crop]
+                frame = compositing.blend(frame[crop], glow, 0.3)
+                luminance += compositing.luminance_sum(frame)
+                blended.append(frame)
+        
+        composite.close()
+        mean = int(luminance / (width * height) + 0.5)
+        for band in _bands(height, rows):
+            with profiling.span('poster.band', style='liquid', top=band.start, stage='contrast'):
+                frame = compositing.contrast(blended.read(band), 1.4, mean=mean)
+            yield frame
+    finally:
+        composite.close()
+        blended.close()
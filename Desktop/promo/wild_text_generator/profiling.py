@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+PROFILING
+Stage-level spans around every render helper: wall time, CPU time, allocations
+Off by default; enable() it, add hooks, or run a CLI with --profile out.json
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Profiler:
+    """Collects timing spans and hands each finished one to registered hooks"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.track_memory = False
+        self.keep_spans = False
+        self.spans = []
+        self.hooks = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+    
+    def enable(self, track_memory=True, keep_spans=True):
+        """Start recording spans; track_memory traces allocations with tracemalloc
+        
+        keep_spans keeps every span for summary() and write(); without it
+        spans only go to the hooks. tracemalloc is process-wide, so while
+        several threads render, a span's allocations include the other
+        threads' too: turn track_memory off for threaded runs.
+        """
+        self.enabled = True
+        self.track_memory = track_memory
+        self.keep_spans = keep_spans
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+    
+    def disable(self):
+        self.enabled = False
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.track_memory = False
+        self.keep_spans = False
+    
+    def add_hook(self, hook):
+        """Call hook(span) for every finished span; enables the profiler
+        
+        Enabled this way, spans are handed to the hooks and not kept, so a
+        long-running process with hooks doesn't grow.
+        """
+        self.hooks.append(hook)
+        if not self.enabled:
+            self.enable(track_memory=False, keep_spans=False)
+    
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time the enclosed block as one stage"""
+        if not self.enabled:
+            yield
+            return
+        
+        stack = self._stack()
+        memory = self._memory_start(stack)
+        entry = {'name': name, 'memory': memory}
+        stack.append(entry)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            stack.pop()
+            record = {
+                'name': name,
+                'parent': stack[-1]['name'] if stack else None,
+                'depth': len(stack),
+                'wall': wall,
+                'cpu': cpu,
+                'alloc_bytes': self._memory_end(stack, entry),
+                'pid': os.getpid(),
+                'thread': threading.current_thread().name,
+            }
+            if attrs:
+                record['attrs'] = attrs
+            self.record([record])
+    
+    def record(self, spans):
+        """Add finished spans (also spans collected in other processes)"""
+        if self.keep_spans:
+            with self._lock:
+                self.spans.extend(spans)
+        for span in spans:
+            for hook in self.hooks:
+                hook(span)
+    
+    def drain(self):
+        """Return and forget the spans recorded so far"""
+        with self._lock:
+            spans, self.spans = self.spans, []
+        return spans
+    
+    def summary(self):
+        """Per-stage totals: calls, wall, CPU and peak allocation"""
+        stages = {}
+        for span in self.spans:
+            stage = stages.setdefault(span['name'], {
+                'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'max_alloc_bytes': 0})
+            stage['calls'] += 1
+            stage['wall'] += span['wall']
+            stage['cpu'] += span['cpu']
+            stage['max_alloc_bytes'] = max(stage['max_alloc_bytes'], span['alloc_bytes'] or 0)
+        for stage in stages.values():
+            stage['mean_wall'] = stage['wall'] / stage['calls']
+        return dict(sorted(stages.items(), key=lambda item: -item[1]['wall']))
+    
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump({'summary': self.summary(), 'spans': self.spans}, f, indent=2)
+    
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+    
+    def _memory_start(self, stack):
+        if not (self.track_memory and tracemalloc.is_tracing()):
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        # Fold the peak so far into the enclosing span before resetting it
+        if stack and stack[-1]['memory']:
+            stack[-1]['memory']['peak'] = max(stack[-1]['memory']['peak'], peak)
+        tracemalloc.reset_peak()
+        return {'start': current, 'peak': current}
+    
+    def _memory_end(self, stack, entry):
+        memory = entry['memory']
+        if memory is None or not tracemalloc.is_tracing():
+            return None
+        peak = max(memory['peak'], tracemalloc.get_traced_memory()[1])
+        if stack and stack[-1]['memory']:
+            stack[-1]['memory']['peak'] = max(stack[-1]['memory']['peak'], peak)
+        tracemalloc.reset_peak()
+        return peak - memory['start']
+
+
+profiler = Profiler()
+
+
+def span(name, **attrs):
+    """Span on the process-wide profiler"""
+    return profiler.span(name, **attrs)
+
+
+def stage(func):
+    """Decorator: run every call of a render helper inside its own span"""
+    name = func.__qualname__
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return func(*args, **kwargs)
+        with profiler.span(name):
+            return func(*args, **kwargs)
+    
+    return wrapper
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+RESULT CACHE
+Finished renders on disk, named by a hash of everything that went into them
+A repeat request copies the file instead of rendering; least recently used files go first
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+import export
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+PIL = lazy_import('PIL')
+Image = lazy_import('PIL.Image')
+
+# Bump whenever any style, flyer layout or encoder setting changes its output
+RESULT_VERSION = 2
+
+# Setting these turns the cache on, also for pool workers
+CACHE_DIR_ENV = 'WILD_RESULT_CACHE'
+CACHE_MB_ENV = 'WILD_RESULT_CACHE_MB'
+DEFAULT_MAX_MB = 2048
+
+
+def result_key(**inputs):
+    """Hex digest naming a result: every render input, plus what else shapes the pixels
+    
+    inputs must be JSON-serialisable (tuples become lists). The renderer
+    version and the numpy and Pillow versions are mixed in, so an upgrade
+    never serves a file an older renderer made.
+    """
+    inputs = dict(inputs, _version=RESULT_VERSION, _numpy=np.__version__, _pillow=PIL.__version__)
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """Size-capped directory of finished images, shared safely between processes
+    
+    Entries are written to a temp file and renamed into place, so readers
+    (other threads or pool workers) only ever see whole files. A file's
+    mtime is its last use; the oldest are deleted past max_bytes.
+    """
+    
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_MB * 2**20):
+        self.directory = None
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        if directory:
+            self.enable(directory)
+    
+    @property
+    def enabled(self):
+        return self.directory is not None
+    
+    def enable(self, directory, max_bytes=None):
+        """Keep results in directory, capped at max_bytes"""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+    
+    def copy_to(self, key, fmt, dest):
+        """Copy the cached result to dest; False on a miss"""
+        if not self.enabled:
+            return False
+        path = self._path(key, fmt)
+        try:
+            _atomic_copy(path, Path(dest))
+            os.utime(path)
+        except OSError:
+            # Missing, or evicted by another process while copying
+            self._count('misses')
+            return False
+        self._count('hits')
+        return True
+    
+    def read(self, key, fmt):
+        """Encoded bytes of the cached result, or None on a miss"""
+        if not self.enabled:
+            return None
+        path = self._path(key, fmt)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return data
+    
+    def store(self, key, fmt, source):
+        """Add the finished file at source under key"""
+        if self.enabled:
+            self._put(key, fmt, lambda tmp: shutil.copyfile(source, tmp))
+    
+    def write(self, key, fmt, data):
+        """Add encoded bytes under key"""
+        if self.enabled:
+            self._put(key, fmt, lambda tmp: Path(tmp).write_bytes(data))
+    
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'writes': self.writes}
+    
+    def _path(self, key, fmt):
+        return self.directory / f"{key}{export.EXTENSIONS[fmt]}"
+    
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def _put(self, key, fmt, fill):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            fill(tmp)
+            os.replace(tmp, self._path(key, fmt))
+        except OSError:
+            # A full or read-only cache only costs the speed-up
+            Path(tmp).unlink(missing_ok=True)
+            return
+        self._count('writes')
+        self._trim()
+    
+    def _trim(self):
+        """Delete least recently used results until the directory fits its cap"""
+        files = []
+        for path in self.directory.iterdir():
+            if path.suffix == '.tmp':
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def _atomic_copy(source, dest):
+    """Copy source over dest so dest is never seen half-written"""
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, dest)
+    except OSError:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def cached_export(targets, keys):
+    """Copy every (size, fmt, path) target out of the cache; {size: image} or None
+    
+    keys maps each target's path to its result key. None means at least
+    one target missed and the caller has to render (targets already
+    copied are simply overwritten). The images are loaded back from the
+    first file of each size.
+    """
+    if not cache.enabled:
+        return None
+    for size, fmt, path in targets:
+        if not cache.copy_to(keys[path], fmt, path):
+            return None
+    images = {}
+    for size, _, path in targets:
+        if size not in images:
+            with Image.open(path) as image:
+                images[size] = image.convert('RGB')
+    return images
+
+
+def load_image(key):
+    """Image stored with save_image(), or None"""
+    data = cache.read(key, 'png')
+    if data is None:
+        return None
+    with Image.open(io.BytesIO(data)) as image:
+        return image.convert('RGB')
+
+
+def save_image(key, image):
+    """Keep an intermediate image (e.g. a flyer's headline) under key, fast-compressed"""
+    if cache.enabled:
+        buffer = io.BytesIO()
+        image.save(buffer, 'PNG', compress_level=1)
+        cache.write(key, 'png', buffer.getvalue())
+
+
+def enable_from_args(directory, max_mb=DEFAULT_MAX_MB):
+    """Turn the cache on for a CLI run and the pool workers it starts"""
+    # Exported too, so pool workers started with spawn find the same cache
+    os.environ[CACHE_DIR_ENV] = str(directory)
+    os.environ[CACHE_MB_ENV] = str(max_mb)
+    cache.enable(directory, max_mb * 2**20)
+
+
+cache = ResultCache(os.environ.get(CACHE_DIR_ENV),
+                    int(os.environ.get(CACHE_MB_ENV) or DEFAULT_MAX_MB) * 2**20)
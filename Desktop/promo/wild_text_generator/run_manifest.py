@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+RUN MANIFEST
+Renders every party of a JSON/CSV manifest in every requested size, across cores
+Every size of a headline is cut from one render; finished flyers are checkpointed
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import batch
+import export
+import profiling
+import styles
+from flyer_generator import PartyFlyerGenerator
+
+DEFAULT_SIZES = ['1080x1350']
+
+# Seconds to compose and save one flyer around its headline, fitted like styles.py's costs
+COMPOSE_COST = styles.Cost(0.105, 0.0405)
+
+# Manifest / template key -> create_party_flyer argument
+KEY_ALIASES = {'party': 'party_name', 'info': 'bottom_text'}
+LIST_KEYS = ['lineup', 'bottom_text', 'sizes']
+
+
+def read_manifest(path, generator):
+    """Party entries of a JSON (list or {"parties": [...]}) or CSV manifest
+    
+    CSV list columns (lineup, info, sizes) separate items with ';'. An
+    entry may name a saved template or config file under "config"; its
+    values are loaded first and the entry's own values override them.
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        with open(path, newline='') as f:
+            entries = [{key: value for key, value in row.items() if value not in (None, '')}
+                       for row in csv.DictReader(f)]
+        for entry in entries:
+            for key in ('lineup', 'info', 'sizes'):
+                if key in entry:
+                    entry[key] = [item.strip() for item in entry[key].split(';') if item.strip()]
+            if 'seed' in entry:
+                entry['seed'] = int(entry['seed'])
+    else:
+        manifest = generator.load_party_config(path)
+        entries = manifest['parties'] if isinstance(manifest, dict) else manifest
+    
+    parties = []
+    for number, entry in enumerate(entries, 1):
+        if 'config' in entry:
+            entry = {**generator.load_party_config(path.parent / entry['config']), **entry}
+        parties.append(normalize_entry(entry, number))
+    return parties
+
+
+def normalize_entry(entry, number):
+    """Validated create_party_flyer arguments plus sizes for one manifest entry"""
+    party = {KEY_ALIASES.get(key, key): value for key, value in entry.items()}
+    for key in ('party_name', 'headline', 'date', 'venue'):
+        if not party.get(key):
+            raise ValueError(f"Manifest entry {number}: '{key}' is required")
+    
+    party.setdefault('style', 'particle')
+    if party['style'] not in styles.names():
+        raise ValueError(f"Manifest entry {number}: unknown style '{party['style']}'")
+    for key in LIST_KEYS:
+        if isinstance(party.get(key), str):
+            party[key] = [party[key]]
+    
+    # No seed: derive one from the party name so a resumed run picks the same
+    if party.get('seed') is None:
+        party['seed'] = zlib.crc32(party['party_name'].encode()) % 1000000
+    
+    return {
+        'party_name': party['party_name'],
+        'headline': party['headline'],
+        'date': party['date'],
+        'venue': party['venue'],
+        'style': party['style'],
+        'seed': int(party['seed']),
+        'lineup': party.get('lineup'),
+        'bottom_text': party.get('bottom_text'),
+        'sizes': [export.parse_size(size) for size in party.get('sizes') or DEFAULT_SIZES],
+    }
+
+
+def item_id(party, size):
+    """Stable id of one flyer: changes whenever anything drawn on it changes"""
+    content = {key: value for key, value in party.items() if key != 'sizes'}
+    content['size'] = list(size)
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def plan_jobs(parties, generator, completed):
+    """Group flyers that share a headline render into one job each
+    
+    Returns (jobs, skipped): every job renders one (headline, style, seed)
+    headline, cuts it to each size needed and composes all parties using it.
+    Flyers are named like flyer_generator.py --sizes names them, in
+    generator's output_dir.
+    """
+    groups = {}
+    skipped = 0
+    for party in parties:
+        stem = generator.output_stem(party['party_name'], party['seed'], party['style'])
+        for width, height in party['sizes']:
+            flyer_id = item_id(party, (width, height))
+            path = export.output_path(stem, 'png', (width, height))
+            if flyer_id in completed and path.exists():
+                skipped += 1
+                continue
+            
+            key = (party['headline'], party['style'], party['seed'])
+            groups.setdefault(key, []).append({
+                'id': flyer_id,
+                'size': (width, height),
+                'path': str(path),
+                'party_name': party['party_name'],
+                'date': party['date'],
+                'venue': party['venue'],
+                'lineup': party['lineup'],
+                'bottom_text': party['bottom_text'],
+            })
+    
+    jobs = [{'headline': headline, 'style': style, 'seed': seed, 'items': items}
+            for (headline, style, seed), items in groups.items()]
+    return jobs, skipped
+
+
+def job_cost(job, generator):
+    """Estimated seconds of a plan_jobs() job: its headline render plus every flyer"""
+    sizes = [item['size'] for item in job['items']]
+    return (generator.estimate_headlines(job['style'], sizes)
+            + sum(COMPOSE_COST.estimate(*size) for size in sizes))
+
+
+def _render_group_job(job):
+    """Pool task: one headline render, then every flyer that shares it"""
+    headlines = batch.call_worker('render_headlines', {
+        'headline': job['headline'], 'style': job['style'], 'seed': job['seed'],
+        'sizes': [item['size'] for item in job['items']]})
+    
+    done = []
+    for item in job['items']:
+        start = time.perf_counter()
+        generator = batch.call_worker('at_size', {'width': item['size'][0], 'height': item['size'][1]})
+        flyer = generator.compose_flyer(headlines[item['size']], item['party_name'], item['date'],
+                                        item['venue'], item['lineup'], item['bottom_text'])
+        flyer.save(item['path'], 'PNG')
+        done.append((item['id'], item['path'], time.perf_counter() - start))
+    return done
+
+
+class Checkpoint:
+    """Append-only record of finished flyers, one JSON line each"""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.completed = set()
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        self.completed.add(json.loads(line)['id'])
+                    except (ValueError, KeyError):
+                        # A line cut short by an interrupted run
+                        continue
+    
+    def record(self, done):
+        with open(self.path, 'a') as f:
+            for flyer_id, path, seconds in done:
+                f.write(json.dumps({'id': flyer_id, 'path': path, 'seconds': round(seconds, 4)}) + '\n')
+                self.completed.add(flyer_id)
+            f.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='📋 RUN MANIFEST - Flyers for every party and size in one run',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Manifest (JSON):
+  {"parties": [
+    {"party": "VIBES", "headline": "VIBES", "date": "DEC 25", "venue": "ROOFTOP",
+     "style": "liquid", "seed": 42, "lineup": ["DJ A"], "info": ["TICKETS"],
+     "sizes": ["1080x1350", "1080", "1920x1080"]},
+    {"config": "templates/GENIUS_PARTY_template.json", "sizes": ["1080x1350"]}
+  ]}
+
+Manifest (CSV): party,headline,date,venue,style,seed,lineup,info,sizes
+  with ';' between items of lineup, info and sizes
+
+Examples:
+  python3 run_manifest.py weekend.json --workers 8
+  python3 run_manifest.py weekend.csv --output-dir weekend/ --save-templates
+        """
+    )
+    
+    parser.add_argument('manifest', help='JSON or CSV manifest of parties')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Render in N parallel processes (default: 1)')
+    parser.add_argument('--output-dir', default='flyers', help='Where flyers go (default: flyers)')
+    parser.add_argument('--checkpoint', default=None,
+                        help='Progress file for resuming (default: <output-dir>/<manifest>.progress.jsonl)')
+    parser.add_argument('--fresh', action='store_true', help='Ignore the checkpoint and redo everything')
+    parser.add_argument('--save-templates', action='store_true',
+                        help='Save every party as a reusable template too')
+    parser.add_argument('--profile', metavar='OUT.json',
+                        help='Write per-stage wall time, CPU time and allocations to this JSON file')
+    
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    if args.profile:
+        profiling.profiler.enable()
+    
+    generator = PartyFlyerGenerator()
+    parties = read_manifest(args.manifest, generator)
+    
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    generator.output_dir = output_dir
+    checkpoint_path = args.checkpoint or output_dir / f"{Path(args.manifest).stem}.progress.jsonl"
+    if args.fresh:
+        Path(checkpoint_path).unlink(missing_ok=True)
+    checkpoint = Checkpoint(checkpoint_path)
+    
+    jobs, skipped = plan_jobs(parties, generator, checkpoint.completed)
+    flyers = sum(len(job['items']) for job in jobs)
+    costs = [job_cost(job, generator) for job in jobs]
+    workers = max(args.workers, 1)
+    
+    print("📋 RUN MANIFEST 📋")
+    print(f"Manifest: {args.manifest} ({len(parties)} parties)")
+    print(f"Flyers: {flyers} to render, {skipped} already done")
+    print(f"Headline renders: {len(jobs)}")
+    print(f"Estimated: {sum(costs):.1f}s of rendering, ~{batch.estimated_wall_time(costs, workers):.1f}s "
+          f"on {workers} worker(s), longest first")
+    print("=" * 50)
+    
+    # Per-flyer chatter would drown the progress lines
+    logging.getLogger('wild_generator').setLevel(logging.WARNING)
+    start = time.perf_counter()
+    rendered = []
+    
+    def report(done, total, result):
+        checkpoint.record(result)
+        for _, path, _ in result:
+            rendered.append(path)
+            print(f"[{len(rendered)}/{flyers}] ✅ {path}")
+    
+    batch.run_parallel(_render_group_job, jobs, args.workers, PartyFlyerGenerator, {}, on_done=report,
+                       cost=lambda job: job_cost(job, generator))
+    elapsed = time.perf_counter() - start
+    
+    if args.save_templates:
+        for party in parties:
+            config = {
+                'headline': party['headline'],
+                'date': party['date'],
+                'venue': party['venue'],
+                'lineup': party['lineup'],
+                'info': party['bottom_text'],
+                'sizes': [f"{width}x{height}" for width, height in party['sizes']],
+            }
+            generator.save_party_template(party['party_name'], party['style'], party['seed'], config)
+    
+    print("\n" + "=" * 50)
+    print("📋 MANIFEST COMPLETE!")
+    print(f"Rendered {flyers} flyer(s) from {len(jobs)} headline render(s) in {elapsed:.1f}s "
+          f"on {workers} worker(s)")
+    if flyers:
+        print(f"Throughput: {flyers / elapsed:.2f} flyers/s, {elapsed / flyers * 1000:.0f} ms per flyer")
+    if skipped:
+        print(f"Skipped {skipped} flyer(s) finished by an earlier run (checkpoint: {checkpoint_path})")
+    if args.profile:
+        profiling.profiler.write(args.profile)
+        print(f"⏱️  Profile: {args.profile}")
+    print("=" * 50)
+
+
+if __name__ == '__main__':
+    main()
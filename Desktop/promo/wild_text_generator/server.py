@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+RENDER SERVER
+Local HTTP service that keeps warm flyer workers and answers with PNG bytes
+Standard library only: POST /flyer, GET /stats, GET /health
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import batch
+import export
+import fonts
+import result_cache
+import styles
+from flyer_generator import PartyFlyerGenerator
+
+
+# JSON field -> render_flyer argument; the fields mirror the CLI options
+REQUIRED_FIELDS = {'party': 'party_name', 'headline': 'headline', 'date': 'date', 'venue': 'venue'}
+LIST_FIELDS = {'lineup': 'lineup', 'info': 'bottom_text'}
+
+# Largest request body read; a flyer request is a few hundred bytes
+MAX_BODY_BYTES = 64 * 1024
+
+
+class QueueFull(Exception):
+    """More requests are waiting than the queue allows"""
+
+
+def parse_flyer_request(body):
+    """Validate a JSON request body; returns render_flyer keyword arguments"""
+    try:
+        request = json.loads(body or b'{}')
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+    if not isinstance(request, dict):
+        raise ValueError("Request body must be a JSON object")
+    
+    kwargs = {}
+    for field, arg in REQUIRED_FIELDS.items():
+        if not isinstance(request.get(field), str) or not request[field]:
+            raise ValueError(f"'{field}' is required and must be a string")
+        kwargs[arg] = request[field]
+    
+    for field, arg in LIST_FIELDS.items():
+        value = request.get(field)
+        if value is not None and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+            raise ValueError(f"'{field}' must be a list of strings")
+        kwargs[arg] = value
+    
+    kwargs['style'] = request.get('style', 'particle')
+    if kwargs['style'] not in styles.names():
+        raise ValueError(f"'style' must be one of {', '.join(styles.names())}")
+    
+    seed = request.get('seed')
+    if seed is None:
+        seed = random.randint(0, 999999)
+    elif not isinstance(seed, int) or isinstance(seed, bool):
+        raise ValueError("'seed' must be an integer")
+    kwargs['seed'] = seed
+    return kwargs
+
+
+def _warm_worker(_):
+    """Load the flyer fonts so a worker's first request pays for nothing but rendering"""
+    for size in (60, 40):
+        fonts.registry.bold(size)
+    for size in (35, 28):
+        fonts.registry.regular(size)
+    return os.getpid()
+
+
+def _render_flyer_png(kwargs):
+    """Pool task: render one flyer and encode it, all inside the worker
+    
+    With a result cache (--result-cache) a flyer asked for before is read
+    straight from it.
+    """
+    options = export.Exporter(workers=0).options('png')
+    key = batch.call_worker('result_key', dict(kwargs, fmt='png', options=options))
+    png = result_cache.cache.read(key, 'png')
+    if png is None:
+        flyer = batch.call_worker('render_flyer', kwargs)
+        buffer = io.BytesIO()
+        flyer.save(buffer, 'PNG', **options)
+        png = buffer.getvalue()
+        result_cache.cache.write(key, 'png', png)
+    return png
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, round(fraction * len(values)) - 1))
+    return values[index]
+
+
+class RenderService:
+    """Warm process pool behind a bounded wait queue and a concurrency limit"""
+    
+    def __init__(self, workers=None, concurrency=None, max_queue=32, queue_timeout=60.0,
+                 width=1080, height=1350):
+        self.workers = workers or os.cpu_count() or 1
+        self.concurrency = concurrency or self.workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=batch.init_worker,
+            initargs=(PartyFlyerGenerator, {'width': width, 'height': height}))
+        self.started = time.time()
+        self.waiting = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=1000)
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+    
+    def warm_up(self):
+        """Start every worker and load its fonts before the first request"""
+        list(self.pool.map(_warm_worker, range(self.workers)))
+    
+    def render_png(self, kwargs):
+        """Render a flyer in the pool; waits for a free slot or raises QueueFull"""
+        start = time.perf_counter()
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(f"{self.waiting} requests already waiting")
+            self.waiting += 1
+        
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        with self._lock:
+            self.waiting -= 1
+            if not acquired:
+                self.rejected += 1
+            else:
+                self.active += 1
+        if not acquired:
+            raise QueueFull(f"no render slot free after {self.queue_timeout:g}s")
+        
+        try:
+            png = self.pool.submit(_render_flyer_png, kwargs).result()
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+        
+        with self._lock:
+            self.completed += 1
+            self.latencies.append(time.perf_counter() - start)
+        return png
+    
+    def stats(self):
+        """Queue depth, counters and latency percentiles of recent requests"""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            stats = {
+                'workers': self.workers,
+                'concurrency': self.concurrency,
+                'max_queue': self.max_queue,
+                'queue_depth': self.waiting,
+                'active': self.active,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'uptime_seconds': round(time.time() - self.started, 1),
+            }
+        stats['latency_ms'] = {
+            name: None if value is None else round(value * 1000, 1)
+            for name, value in (('p50', percentile(latencies, 0.5)),
+                                ('p90', percentile(latencies, 0.9)),
+                                ('p99', percentile(latencies, 0.99)),
+                                ('max', latencies[-1] if latencies else None))
+        }
+        stats['latency_samples'] = len(latencies)
+        return stats
+    
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    server_version = 'WildRender/1.0'
+    
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.server.service.stats())
+        elif self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+    
+    def do_POST(self):
+        if self.path != '/flyer':
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+        
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY_BYTES:
+            # The body is left unread, so the connection can't carry another request
+            self.close_connection = True
+            self._send_json(400, {'error': f"Content-Length must be 0 to {MAX_BODY_BYTES} bytes"})
+            return
+        
+        try:
+            kwargs = parse_flyer_request(self.rfile.read(length))
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        
+        try:
+            png = self.server.service.render_png(kwargs)
+        except QueueFull as e:
+            self._send_json(503, {'error': f"Busy: {e}"}, headers={'Retry-After': '1'})
+            return
+        except Exception as e:
+            logging.exception("Render failed")
+            self._send_json(500, {'error': f"Render failed: {e}"})
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(png)))
+        self.send_header('X-Seed', str(kwargs['seed']))
+        self.end_headers()
+        # Stream in chunks so a slow client never holds a second full copy
+        view = memoryview(png)
+        for start in range(0, len(view), 64 * 1024):
+            self.wfile.write(view[start:start + 64 * 1024])
+    
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        logging.info("%s - %s", self.address_string(), format % args)
+
+
+def make_server(service, host='127.0.0.1', port=8765):
+    """HTTP server answering with the given RenderService"""
+    server = ThreadingHTTPServer((host, port), RenderHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='🛰️  WILD RENDER SERVER - Flyers over local HTTP from warm workers',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 server.py --workers 4
+  curl -s -X POST localhost:8765/flyer -o flyer.png \\
+       -d '{"party": "VIBES", "headline": "VIBES", "date": "DEC 25", "venue": "ROOFTOP"}'
+  curl -s localhost:8765/stats
+        """
+    )
+    
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port (default: 8765)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Warm render processes (default: one per CPU)')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='Renders in flight at once (default: --workers)')
+    parser.add_argument('--max-queue', type=int, default=32,
+                        help='Requests allowed to wait for a slot before answering 503 (default: 32)')
+    parser.add_argument('--queue-timeout', type=float, default=60.0,
+                        help='Seconds a request may wait for a slot (default: 60)')
+    parser.add_argument('--width', type=int, default=1080, help='Flyer width (default: 1080)')
+    parser.add_argument('--height', type=int, default=1350, help='Flyer height (default: 1350)')
+    parser.add_argument('--result-cache', metavar='DIR',
+                        help='Keep finished flyers in DIR and answer repeats from it')
+    parser.add_argument('--result-cache-mb', type=int, default=result_cache.DEFAULT_MAX_MB, metavar='MB',
+                        help=f'Size cap of --result-cache; least recently used flyers go first '
+                             f'(default: {result_cache.DEFAULT_MAX_MB})')
+    
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    if args.result_cache:
+        result_cache.enable_from_args(args.result_cache, args.result_cache_mb)
+    
+    print("🛰️  WILD RENDER SERVER")
+    print("=" * 50)
+    service = RenderService(workers=args.workers, concurrency=args.concurrency,
+                            max_queue=args.max_queue, queue_timeout=args.queue_timeout,
+                            width=args.width, height=args.height)
+    service.warm_up()
+    server = make_server(service, args.host, args.port)
+    print(f"⚡ {service.workers} warm worker(s), {service.concurrency} in flight, "
+          f"queue of {service.max_queue}")
+    print(f"🌐 Listening on http://{args.host}:{args.port} (POST /flyer, GET /stats)")
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+STYLE REGISTRY
+Every style the generators can render: how, in which stages, reusing which layers
+Each one's cost model (fitted with benchmark.py --fit-costs) lets schedulers start the longest renders first
+"""
+
+# Particles scattered over the frame by the particle style, per preset
+PARTICLE_DENSITIES = {
+    'standard': 8000,
+    'dense': 120000,
+}
+
+_registry = {}
+
+
+class Cost:
+    """Estimated seconds of one render: base + per_mpixel * megapixels + per_particle * particles
+    
+    Fitted on one machine, so only the ratios between styles and sizes
+    carry over to another; that is all a scheduler needs.
+    """
+    
+    def __init__(self, base, per_mpixel, per_particle=0.0):
+        self.base = base
+        self.per_mpixel = per_mpixel
+        self.per_particle = per_particle
+    
+    def estimate(self, width, height, particles=0):
+        return self.base + self.per_mpixel * width * height / 1e6 + self.per_particle * particles
+    
+    def __repr__(self):
+        return f"Cost({self.base:.4f}, {self.per_mpixel:.4f}, {self.per_particle:.3g})"
+
+
+class Style:
+    """One render style and what it costs
+    
+    method renders it: the name of a WildTextGenerator method, or for a
+    style defined elsewhere a function(generator, text, seed); either is
+    also passed density= when uses_density. stages are the profiling span
+    names its render emits below the style's own span, in the order they
+    finish; layers are the (style, layer) parts of the layers.cache keys
+    it fills. benchmark.py --style-check renders every style and fails if
+    either no longer matches.
+    """
+    
+    def __init__(self, name, method, stages, cost, layers=(), uses_density=False):
+        self.name = name
+        self.method = method
+        self.stages = tuple(stages)
+        self.cost = cost
+        self.layers = tuple(layers)
+        self.uses_density = uses_density
+    
+    def render(self, generator, text, seed, density='standard'):
+        """Render text with generator; returns the image"""
+        kwargs = {'density': density} if self.uses_density else {}
+        if callable(self.method):
+            return self.method(generator, text, seed, **kwargs)
+        return getattr(generator, self.method)(text, seed, **kwargs)
+    
+    def estimate(self, width, height, density='standard'):
+        """Estimated seconds to render it at width x height"""
+        particles = PARTICLE_DENSITIES[density] if self.uses_density else 0
+        return self.cost.estimate(width, height, particles)
+
+
+def register(style):
+    """Add a style (or replace one of the same name); returns it"""
+    _registry[style.name] = style
+    return style
+
+
+def get(name):
+    if name not in _registry:
+        raise ValueError(f"Unknown style: {name}. Use {', '.join(_registry)}")
+    return _registry[name]
+
+
+def names():
+    """Registered style names, built-in ones first, e.g. for argparse choices"""
+    return list(_registry)
+
+
+def estimate(name, width, height, density='standard'):
+    """Estimated seconds to render style name at width x height"""
+    return get(name).estimate(width, height, density)
+
+
+# Built-in styles; costs from benchmark.py --fit-costs --sizes 540 1080 1620 2160 --repeat 5,
+# at the default max quality
+register(Style(
+    'particle', 'generate_particle_style',
+    stages=['WildTextGenerator.create_melted_text_mask', 'WildTextGenerator.create_energy_field',
+            'WildTextGenerator.generate_particle_field', 'particles.splat', 'particles.composite',
+            'particles.brightness', 'WildTextGenerator.add_chromatic_aberration'],
+    cost=Cost(0.0309, 0.0466, 9.43e-08),
+    uses_density=True,
+))
+
+register(Style(
+    'holographic', 'generate_holographic_style',
+    stages=['WildTextGenerator.create_melted_text_mask', 'WildTextGenerator.holographic_layer',
+            'WildTextGenerator.add_rgb_split', 'holographic.glitch_lines',
+            'WildTextGenerator.add_scan_lines', 'holographic.saturation'],
+    cost=Cost(0.0000, 0.1205),
+    layers=[('holographic', 'background'), ('effects', 'scan_lines')],
+))
+
+register(Style(
+    'liquid', 'generate_liquid_metal_style',
+    stages=['WildTextGenerator.create_melted_text_mask', 'WildTextGenerator.add_drip_effect',
+            'WildTextGenerator.create_dripping_mask', 'WildTextGenerator.create_liquid_metal_bg',
+            'liquid.composite', 'WildTextGenerator.add_reflections', 'liquid.glow',
+            'liquid.contrast'],
+    cost=Cost(0.0781, 0.1500),
+    layers=[('effects', 'reflection_fade')],
+))
@@ -5,373 +5,884 @@ Generates jaw-dropping, hypnotic text visuals for social media
 Party in 14 days - let's make some magic
 """
 
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
 import argparse
 import random
+import logging
 import math
+import os
+import sys
 from pathlib import Path
 import colorsys
+from functools import lru_cache
+
+import batch
+import compositing
+import daemon
+import export
+import fonts
+import layers
+import profiling
+import result_cache
+import styles
+from lazy import lazy_import
+from styles import PARTICLE_DENSITIES
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+ImageDraw = lazy_import('PIL.ImageDraw')
+
+logger = logging.getLogger('wild_generator')
+
+
+@lru_cache(maxsize=1)
+def _hsv_sectors():
+    """colorsys sector table: which of (v, t, p, q) feeds r, g and b for each sector"""
+    return np.array([
+        [0, 1, 2],
+        [3, 0, 2],
+        [2, 0, 1],
+        [2, 3, 0],
+        [1, 2, 0],
+        [0, 2, 3],
+    ])
+
+
+def hsv_to_rgb_array(h, s, v):
+    """Vectorized colorsys.hsv_to_rgb - returns an (..., 3) float array in [0, 1]"""
+    h, s, v = np.broadcast_arrays(np.asarray(h, dtype=np.float64),
+                                  np.asarray(s, dtype=np.float64),
+                                  np.asarray(v, dtype=np.float64))
+    
+    i = np.floor(h * 6.0)
+    f = (h * 6.0) - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    
+    candidates = np.stack([v, t, p, q], axis=-1)
+    sectors = _hsv_sectors()[i.astype(np.intp) % 6]
+    rgb = np.take_along_axis(candidates, sectors, axis=-1)
+    
+    # colorsys short-circuits grays to (v, v, v)
+    gray = s == 0.0
+    if np.any(gray):
+        rgb[gray] = v[gray, None]
+    return rgb
+
+
+def _splat_discs(canvas, x, y, radius, colors, chunk=65536):
+    """Draw filled discs into an (H, W, C) array in bulk, later discs on top"""
+    if len(x) == 0:
+        return canvas
+    height, width = canvas.shape[:2]
+    
+    # ImageDraw.ellipse covers about a quarter pixel past the radius
+    radius = radius + 0.25
+    reach = int(np.ceil(radius.max()))
+    dy, dx = np.divmod(np.arange((2 * reach + 1) ** 2), 2 * reach + 1)
+    dy -= reach
+    dx -= reach
+    dist_sq = dx * dx + dy * dy
+    # Big (upscaled) discs get fewer per chunk, so temporaries stay small
+    chunk = max(1, min(chunk, (1 << 20) // len(dist_sq)))
+    
+    for start in range(0, len(x), chunk):
+        part = slice(start, start + chunk)
+        hit, offset = np.nonzero(dist_sq[None, :] <= radius[part, None] ** 2)
+        px = x[part][hit] + dx[offset]
+        py = y[part][hit] + dy[offset]
+        visible = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+        canvas[py[visible], px[visible]] = colors[part][hit[visible]]
+    
+    return canvas
+
+
+_MAX_BLOB_RADIUS = 300
+_OUTSIDE_BLOB = 255
+
+
+@lru_cache(maxsize=1)
+def _blob_distances():
+    """Distance from the centre of the largest blob's bounding box"""
+    offsets = np.arange(-_MAX_BLOB_RADIUS, _MAX_BLOB_RADIUS + 1, dtype=np.float32)
+    return np.hypot(offsets[:, None], offsets[None, :])
+
+
+@lru_cache(maxsize=64)
+def _blob_rings(radius, scale=1.0):
+    """Ring sprite for a liquid metal blob of the given radius
+    
+    A blob is a stack of concentric discs (radius, radius - 5, ...), so each
+    pixel of its bounding box shows the smallest ring covering it. Returns
+    that ring's index, or _OUTSIDE_BLOB past the outer edge. With scale < 1
+    the blob is drawn shrunk, for previews.
+    """
+    reach = int(radius * scale)
+    margin = _MAX_BLOB_RADIUS - reach
+    size = 2 * reach + 1
+    dist = _blob_distances()[margin:margin + size, margin:margin + size]
+    rings = _ring_index(dist, radius, scale)
+    rings.flags.writeable = False
+    return rings
+
+
+def _blob_window(radius, scale, rows, cols):
+    """_blob_rings(radius, scale)[rows, cols], without building the whole sprite
+    
+    Blobs of upscaled renders (e.g. print posters) outgrow the cached
+    distances and would make sprites of tens of MB each.
+    """
+    reach = int(radius * scale)
+    dy = np.arange(rows.start - reach, rows.stop - reach, dtype=np.float32)
+    dx = np.arange(cols.start - reach, cols.stop - reach, dtype=np.float32)
+    return _ring_index(np.hypot(dy[:, None], dx[None, :]), radius, scale)
+
+
+def _ring_index(dist, radius, scale):
+    """Ring of a blob covering each pixel at distance dist from its centre"""
+    outer = np.float32(radius * scale)
+    inside = dist <= outer
+    rings = np.where(inside, (outer - dist) * np.float32(0.2 / scale), _OUTSIDE_BLOB).astype(np.uint8)
+    # The innermost disc is never smaller than 5px
+    np.minimum(rings, (radius - 1) // 5, out=rings, where=inside)
+    return rings
+
+
+def _blob_shades(radius, brightness):
+    """Gray level of each ring of a blob, indexed like _blob_rings"""
+    base = int(brightness * 255)
+    ring_radii = np.arange(radius, 0, -5)
+    
+    shades = np.zeros(256, dtype=np.float32)
+    shades[:len(ring_radii)] = ((ring_radii / radius) * brightness * base).astype(np.int64)
+    return shades
+
 
 class WildTextGenerator:
-    def __init__(self, width=1080, height=1080):
+    def __init__(self, width=1080, height=1080, font_scale=1.0, design_size=None, quality='max'):
+        if quality not in compositing.QUALITIES:
+            raise ValueError(f"Unknown quality: {quality}. Use {', '.join(compositing.QUALITIES)}")
         self.width = width
         self.height = height
+        self.font_scale = font_scale
+        # Blur tier: 'max' is exact, lower tiers blur big radii downsampled
+        self.quality = quality
+        # Random geometry is drawn on the design canvas and scaled onto this
+        # one, so a preview shows the same picture as the full-size render
+        self.design_width, self.design_height = design_size or (width, height)
+        self.scale = width / self.design_width
+        # Created on first save, so renders kept in memory leave no trace
         self.output_dir = Path("output")
-        self.output_dir.mkdir(exist_ok=True)
-        
+        self._sized = {}
+        self._design = None
+    
+    @profiling.stage
     def create_melted_text_mask(self, text, font_size=200):
         """Create the melted/liquid text style mask"""
-        mask = Image.new('L', (self.width, self.height), 0)
-        draw = ImageDraw.Draw(mask)
-        
-        # Try to use a bold font
-        try:
-            font_paths = [
-                '/System/Library/Fonts/Supplemental/Arial Bold.ttf',
-                '/System/Library/Fonts/Helvetica.ttc',
-                '/Library/Fonts/Arial Bold.ttf',
-            ]
-            font = None
-            for path in font_paths:
-                try:
-                    font = ImageFont.truetype(path, font_size)
-                    break
-                except:
-                    continue
-            if font is None:
-                font = ImageFont.load_default()
-        except:
-            font = ImageFont.load_default()
-        
-        # Center text
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        x = (self.width - text_width) // 2
-        y = (self.height - text_height) // 2
-        
-        draw.text((x, y), text, fill=255, font=font)
-        mask_array = np.array(mask)
+        # Masks are shared between renders, so the array is read-only
+        font_size = max(1, round(font_size * self.font_scale))
+        mask_array = fonts.registry.text_mask(text, font_size, (self.width, self.height))
+        mask = Image.fromarray(mask_array)
         
         return mask, mask_array
     
+    def melted_text_rows(self, text, font_size=200):
+        """(top, mask) of just the rows create_melted_text_mask draws text into"""
+        font_size = max(1, round(font_size * self.font_scale))
+        return fonts.registry.text_rows(text, font_size, (self.width, self.height))
+    
+    @profiling.stage
     def generate_particle_field(self, seed, density=5000):
-        """Generate particle positions"""
-        random.seed(seed)
-        np.random.seed(seed)
-        
-        particles = []
-        for _ in range(density):
-            x = np.random.randint(0, self.width)
-            y = np.random.randint(0, self.height)
-            size = np.random.uniform(1, 4)
-            brightness = np.random.uniform(0.3, 1.0)
-            hue = np.random.uniform(0, 1)
-            particles.append((x, y, size, brightness, hue))
-        
-        return particles
-    
-    def create_energy_field(self, seed, text_mask_array):
-        """Create flowing energy field"""
-        random.seed(seed)
-        img = Image.new('RGB', (self.width, self.height), (0, 0, 0))
+        """Generate particle positions as arrays (x, y, size, brightness, hue)"""
+        # Its own generator, so renders on other threads can't disturb the stream
+        samples = np.random.RandomState(seed).random_sample((5, density))
+        x = (samples[0] * self.width).astype(np.intp)
+        y = (samples[1] * self.height).astype(np.intp)
+        size = (1 + samples[2] * 3) * self.scale
+        brightness = 0.3 + samples[3] * 0.7
+        hue = samples[4]
+        
+        return x, y, size, brightness, hue
+    
+    @profiling.stage
+    def create_energy_field(self, seed, text_mask_array, rows=None):
+        """Create flowing energy field
+        
+        rows (a slice) draws just those rows of the canvas, for tiled renders.
+        """
+        rng = random.Random(seed)
+        s = self.scale
+        rows = rows or slice(0, self.height)
+        # Drawn with enough rows around them for the blur to match the full canvas
+        window = self.blur_window(rows, 5 * s)
+        top = window.start
+        img = Image.new('RGB', (self.width, window.stop - top), (0, 0, 0))
         draw = ImageDraw.Draw(img)
         
         num_flows = 200
         for _ in range(num_flows):
-            x = random.randint(0, self.width)
-            y = random.randint(0, self.height)
-            angle = random.uniform(0, math.pi * 2)
-            length = random.randint(50, 200)
+            x = rng.randint(0, self.design_width) * s
+            y = rng.randint(0, self.design_height) * s
+            angle = rng.uniform(0, math.pi * 2)
+            length = rng.randint(50, 200) * s
             
             end_x = x + math.cos(angle) * length
             end_y = y + math.sin(angle) * length
             
-            hue = random.uniform(0.5, 0.8)
+            hue = rng.uniform(0.5, 0.8)
             r, g, b = colorsys.hsv_to_rgb(hue, 0.8, 0.9)
             color = (int(r * 255), int(g * 255), int(b * 255))
             
-            width = random.randint(1, 3)
-            draw.line([(x, y), (end_x, end_y)], fill=color, width=width)
+            width = max(1, round(rng.randint(1, 3) * s))
+            # Pillow truncates coordinates to ints; doing it before moving them
+            # onto a band keeps the band the same as those rows of the canvas
+            draw.line([(x, int(y) - top), (end_x, int(end_y) - top)], fill=color, width=width)
         
-        img = img.filter(ImageFilter.GaussianBlur(radius=5))
+        img = compositing.blur_image(img, 5 * s, self.quality)
+        if window != rows:
+            img = img.crop((0, rows.start - top, self.width, rows.stop - top))
         return img
     
+    @profiling.stage
     def create_holographic_effect(self, base_color=(180, 100, 255)):
         """Create holographic color shifts"""
-        img = Image.new('RGB', (self.width, self.height), (0, 0, 0))
-        pixels = img.load()
+        return Image.fromarray(self.holographic_layer(), 'RGB')
+    
+    @profiling.stage
+    def holographic_layer(self):
+        """Holographic background as a shared, read-only array"""
+        # Seed-independent, so a batch computes it once per canvas size
+        key = layers.layer_key('holographic', 'background', self._layer_dims(self.width, self.height))
+        return layers.cache.get(key, self._holographic_field)
+    
+    def _holographic_field(self, rows=None):
+        rows = rows or slice(0, self.height)
+        field = np.empty((rows.stop - rows.start, self.width, 3), dtype=np.uint8)
         
-        for y in range(self.height):
-            for x in range(self.width):
-                wave1 = math.sin((x + y) * 0.01) * 0.5 + 0.5
-                wave2 = math.cos((x - y) * 0.008) * 0.5 + 0.5
-                
-                hue = (wave1 * 0.3 + wave2 * 0.2) % 1.0
-                r, g, b = colorsys.hsv_to_rgb(hue, 0.7, wave1 * 0.5)
-                
-                pixels[x, y] = (int(r * 255), int(g * 255), int(b * 255))
+        # In bands of about 128K pixels, so the float temporaries stay small
+        step = max(1, (1 << 17) // self.width)
+        for top in range(rows.start, rows.stop, step):
+            band = slice(top, min(top + step, rows.stop))
+            y, x = np.ogrid[band, 0:self.width]
+            # The waves are laid out in design pixels
+            y, x = y / self.scale, x / self.scale
+            
+            wave1 = np.sin((x + y) * 0.01) * 0.5 + 0.5
+            wave2 = np.cos((x - y) * 0.008) * 0.5 + 0.5
+            
+            hue = (wave1 * 0.3 + wave2 * 0.2) % 1.0
+            rgb = hsv_to_rgb_array(hue, 0.7, wave1 * 0.5)
+            field[band.start - rows.start:band.stop - rows.start] = rgb * 255
         
-        return img
+        return field
     
-    def create_liquid_metal_bg(self, seed):
-        """Create liquid metal background"""
-        random.seed(seed)
-        img = Image.new('RGB', (self.width, self.height), (10, 10, 15))
-        
-        for i in range(100):
-            x = random.randint(-100, self.width + 100)
-            y = random.randint(-100, self.height + 100)
-            radius = random.randint(50, 300)
-            brightness = random.uniform(0.3, 0.9)
-            base = int(brightness * 255)
-            
-            temp_img = Image.new('RGB', (self.width, self.height), (0, 0, 0))
-            draw = ImageDraw.Draw(temp_img)
+    @profiling.stage
+    def create_liquid_metal_bg(self, seed, rows=None):
+        """Create liquid metal background
+        
+        rows (a slice) draws just those rows of the canvas, for tiled renders.
+        """
+        rng = random.Random(seed)
+        num_blobs = 100
+        blend = 0.3
+        
+        s = self.scale
+        rows = rows or slice(0, self.height)
+        # Drawn with enough rows around them for the blur to match the full canvas
+        window = self.blur_window(rows, 15 * s)
+        height = window.stop - window.start
+        
+        # Blending every blob over the whole frame with weight 0.3 is the
+        # same as weighting blob i by 0.3 * 0.7^(blobs after it), so each
+        # blob only has to touch its own bounding box.
+        # Planes: weighted gray level, weighted blob coverage.
+        accum = np.zeros((2, height, self.width), dtype=np.float32)
+        coverage = np.ones(256, dtype=np.float32)
+        coverage[_OUTSIDE_BLOB] = 0
+        
+        for i in range(num_blobs):
+            x = rng.randint(-100, self.design_width + 100)
+            y = rng.randint(-100, self.design_height + 100)
+            radius = rng.randint(50, _MAX_BLOB_RADIUS)
+            brightness = rng.uniform(0.3, 0.9)
             
-            for r in range(radius, 0, -5):
-                alpha = (r / radius) * brightness
-                gray = int(alpha * base)
-                color = (gray, gray + 20, gray + 40)
-                draw.ellipse([x - r, y - r, x + r, y + r], fill=color)
+            x, y, reach = round(x * s), round(y * s), int(radius * s)
+            left, top = x - reach, y - reach
+            x0, y0 = max(left, 0), max(top, window.start)
+            x1 = min(x + reach + 1, self.width)
+            y1 = min(y + reach + 1, window.stop)
+            if x0 >= x1 or y0 >= y1:
+                continue
             
-            img = Image.blend(img, temp_img, 0.3)
+            weight = np.float32(blend * (1 - blend) ** (num_blobs - 1 - i))
+            sprite_rows, sprite_cols = slice(y0 - top, y1 - top), slice(x0 - left, x1 - left)
+            if reach <= _MAX_BLOB_RADIUS:
+                rings = _blob_rings(radius, s)[sprite_rows, sprite_cols]
+            else:
+                rings = _blob_window(radius, s, sprite_rows, sprite_cols)
+            y0, y1 = y0 - window.start, y1 - window.start
+            accum[0, y0:y1, x0:x1] += np.take(_blob_shades(radius, brightness) * weight, rings)
+            accum[1, y0:y1, x0:x1] += np.take(coverage * weight, rings)
+        
+        # Blob color is (gray, gray + 20, gray + 40) wherever a blob was drawn.
+        # Converted in row bands so no full-frame float temporaries are made.
+        rgb = np.empty((height, self.width, 3), dtype=np.uint8)
+        for y in range(0, height, 256):
+            band = slice(y, y + 256)
+            for c, (offset, start) in enumerate(zip((0, 20, 40), (10, 10, 15))):
+                channel = accum[0, band] + accum[1, band] * offset
+                # Image.blend truncated after every step, costing about one level
+                channel += start * (1 - blend) ** num_blobs - 1.0
+                rgb[band, :, c] = np.clip(channel, 0, 255)
+        del accum
         
-        img = img.filter(ImageFilter.GaussianBlur(radius=15))
+        img = Image.fromarray(rgb, 'RGB')
+        del rgb
+        img = compositing.blur_image(img, 15 * s, self.quality)
+        if window != rows:
+            img = img.crop((0, rows.start - window.start, self.width, rows.stop - window.start))
         return img
     
-    def add_chromatic_aberration(self, img, strength=2):
-        """Add RGB split effect"""
-        r, g, b = img.split()
-        r = r.transform(img.size, Image.AFFINE, (1, 0, -strength, 0, 1, 0))
-        b = b.transform(img.size, Image.AFFINE, (1, 0, strength, 0, 1, 0))
-        return Image.merge('RGB', (r, g, b))
+    def blur_window(self, rows, radius):
+        """rows plus the rows around them a blur of radius needs, aligned for downsampling"""
+        return compositing.padded_rows(rows, compositing.blur_reach(radius, self.quality), self.height,
+                                       align=compositing.blur_factor(radius, self.quality))
+    
+    @profiling.stage
+    def add_chromatic_aberration(self, frame, strength=2):
+        """Add RGB split effect to a frame array, in place"""
+        compositing.shift_columns(frame[:, :, 0], strength)
+        compositing.shift_columns(frame[:, :, 2], -strength)
+        return frame
     
+    @profiling.stage
     def shift_mask(self, mask, offset):
         """Shift mask for glitch effect"""
         return mask.transform(mask.size, Image.AFFINE, (1, 0, offset[0], 0, 1, offset[1]))
     
-    def add_scan_lines(self, img, seed):
-        """Add scan line effect"""
-        overlay = Image.new('RGBA', (self.width, self.height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        random.seed(seed)
-        
-        for y in range(0, self.height, 4):
-            opacity = random.randint(10, 30)
-            draw.line([(0, y), (self.width, y)], fill=(255, 255, 255, opacity), width=1)
+    @profiling.stage
+    def add_scan_lines(self, frame, seed):
+        """Add scan line effect to a frame array, in place"""
+        return compositing.alpha_over_rows(frame, 255, self.scan_line_alpha(seed))
+    
+    def scan_line_alpha(self, seed):
+        """Opacity of the white scan line over each row of the canvas"""
+        key = layers.layer_key('effects', 'scan_lines', (self.design_height,), seed)
+        opacities = layers.cache.get(key, lambda: self._scan_line_opacities(seed))
         
-        img = img.convert('RGBA')
-        img = Image.alpha_composite(img, overlay)
-        return img.convert('RGB')
+        if self.scale == 1:
+            row_alpha = np.zeros(self.height, dtype=np.uint8)
+            row_alpha[::4] = opacities
+            return row_alpha
+        # Lines are thinner than a preview pixel: each row gets the mean
+        # opacity of the design rows it covers
+        return self._scaled_scan_lines(opacities)
     
+    def _scan_line_opacities(self, seed):
+        """Opacity of every 4th design row's white scan line"""
+        rng = random.Random(seed)
+        return np.array([rng.randint(10, 30) for _ in range(0, self.design_height, 4)], dtype=np.uint8)
+    
+    def _scaled_scan_lines(self, opacities):
+        """Scan line opacity per row of this canvas, area-averaged over design rows"""
+        design = np.zeros(self.design_height, dtype=np.float64)
+        design[::4] = opacities
+        covered = np.concatenate([[0.0], np.cumsum(design)])
+        edges = np.minimum(np.arange(self.height + 1) / self.scale, self.design_height)
+        totals = np.interp(edges, np.arange(self.design_height + 1), covered)
+        return (np.diff(totals) / np.maximum(np.diff(edges), 1e-9)).astype(np.uint8)
+    
+    @profiling.stage
     def add_drip_effect(self, mask, seed):
         """Add dripping effect"""
-        random.seed(seed)
         mask_array = np.array(mask)
+        self.place_drips(mask_array, seed)
+        return Image.fromarray(mask_array)
+    
+    def place_drips(self, mask_array, seed):
+        """Draw drips into mask_array in place
+        
+        Returns the drips as (top, bottom, x_start, x_end, ramp) in drawing
+        order, so they can be redrawn later (e.g. growing, for animations).
+        """
+        rng = random.Random(seed)
+        drips = []
+        
+        # Lowest text pixel per column, found for every column at once
+        text = mask_array > 128
+        has_text = text.any(axis=0)
+        bottoms = self.height - 1 - np.argmax(text[::-1], axis=0)
+        
+        # Drips can extend the text into neighbouring columns, so any column
+        # a previous drip touched gets its bottom re-scanned before use
+        dirty_until = -1
+        fades = {}
         
         for x in range(self.width):
-            column = mask_array[:, x]
-            text_pixels = np.where(column > 128)[0]
-            
-            if len(text_pixels) > 0:
+            if x <= dirty_until:
+                text_pixels = np.flatnonzero(mask_array[:, x] > 128)
+                if len(text_pixels) == 0:
+                    continue
                 bottom = text_pixels[-1]
+            elif has_text[x]:
+                bottom = bottoms[x]
+            else:
+                continue
+            
+            if rng.random() > 0.7:
+                drip_length = rng.randint(20, 80)
+                drip_width = rng.randint(3, 10)
+                
+                if drip_length not in fades:
+                    fade = 1 - np.arange(drip_length) / drip_length
+                    fades[drip_length] = (255 * fade).astype(np.uint8)
                 
-                if random.random() > 0.7:
-                    drip_length = random.randint(20, 80)
-                    drip_width = random.randint(3, 10)
-                    
-                    for dy in range(drip_length):
-                        y = bottom + dy
-                        if y < self.height:
-                            for dx in range(-drip_width // 2, drip_width // 2):
-                                nx = x + dx
-                                if 0 <= nx < self.width:
-                                    fade = 1 - (dy / drip_length)
-                                    mask_array[y, nx] = int(255 * fade)
+                y_end = min(bottom + drip_length, self.height)
+                x_start = max(x + (-drip_width // 2), 0)
+                x_end = min(x + drip_width // 2, self.width)
+                if x_start < x_end:
+                    ramp = fades[drip_length][:y_end - bottom]
+                    mask_array[bottom:y_end, x_start:x_end] = ramp[:, None]
+                    dirty_until = max(dirty_until, x_end - 1)
+                    drips.append((bottom, y_end, x_start, x_end, ramp))
         
-        return Image.fromarray(mask_array)
+        return drips
     
-    def add_reflections(self, img, mask):
-        """Add reflection effect"""
-        reflection = img.copy().transpose(Image.FLIP_TOP_BOTTOM)
-        reflection_array = np.array(reflection)
+    def design_drips(self, text, seed, font_size=220):
+        """Drips placed on the design canvas, scaled to this one
         
-        for y in range(self.height):
-            fade = 1 - (y / self.height) * 0.7
-            reflection_array[y] = (reflection_array[y] * fade).astype(np.uint8)
+        Same (top, bottom, x_start, x_end, ramp) as place_drips, for renders
+        larger than their design (see draw_drips).
+        """
+        design = self.design()
+        _, mask_array = design.create_melted_text_mask(text, font_size=font_size)
+        s = self.scale
+        drips = []
+        for top, bottom, x_start, x_end, ramp in design.place_drips(mask_array.copy(), seed):
+            top, bottom = round(top * s), min(round(bottom * s), self.height)
+            # The fade is sampled in design rows, so drips stay smooth
+            ramp = np.interp(np.arange(bottom - top) / s, np.arange(len(ramp)), ramp)
+            drips.append((top, bottom, round(x_start * s), min(round(x_end * s), self.width),
+                          ramp.astype(np.uint8)))
+        return drips
+    
+    def draw_drips(self, mask_rows, drips, top=0):
+        """Draw drips into mask_rows, the canvas rows from top on, in place"""
+        bottom = top + len(mask_rows)
+        for drip_top, drip_bottom, x_start, x_end, ramp in drips:
+            y0, y1 = max(drip_top, top), min(drip_bottom, bottom)
+            if y0 < y1:
+                mask_rows[y0 - top:y1 - top, x_start:x_end] = ramp[y0 - drip_top:y1 - drip_top, None]
+        return mask_rows
+    
+    @profiling.stage
+    def create_dripping_mask(self, text, seed, font_size=220):
+        """Melted text mask with drips running off the bottom of the letters"""
+        if self.scale > 1:
+            # Larger than the design (e.g. print posters): sharp text at this
+            # size with the design's drips scaled onto it
+            _, mask_array = self.create_melted_text_mask(text, font_size=font_size)
+            mask_array = self.draw_drips(mask_array.copy(), self.design_drips(text, seed, font_size))
+            return Image.fromarray(mask_array)
+        if self.scale != 1:
+            # Drips are placed per text column, so a preview drips at design
+            # size and shrinks the mask to keep the same drips
+            mask = self.design().create_dripping_mask(text, seed, font_size=font_size)
+            return mask.resize((self.width, self.height), Image.BOX)
         
-        reflection = Image.fromarray(reflection_array)
-        result = Image.blend(img, reflection, 0.2)
-        return result
+        text_mask, _ = self.create_melted_text_mask(text, font_size=font_size)
+        return self.add_drip_effect(text_mask, seed)
     
-    def generate_particle_style(self, text, seed):
+    def reflection_fade(self):
+        """Strength of the mirrored frame over each row"""
+        key = layers.layer_key('effects', 'reflection_fade', (self.height,))
+        return layers.cache.get(key, lambda: 1 - (np.arange(self.height) / self.height) * 0.7)
+    
+    @profiling.stage
+    def add_reflections(self, frame, mask):
+        """Add reflection effect to a frame array, in place"""
+        fade = self.reflection_fade()
+        
+        # The mirror image is taken before blending changes the frame
+        reflection = np.empty_like(frame)
+        mirrored = frame[::-1]
+        for top in range(0, self.height, compositing.BAND_ROWS):
+            rows = slice(top, top + compositing.BAND_ROWS)
+            reflection[rows] = mirrored[rows] * fade[rows, None, None]
+        
+        return compositing.blend(frame, reflection, 0.2)
+    
+    @profiling.stage
+    def generate_particle_style(self, text, seed, density='standard'):
         """STYLE 1: Particle Energy Field"""
-        print(f"🔮 Generating PARTICLE style for '{text}' (seed: {seed})")
+        logger.info(f"🔮 Generating PARTICLE style for '{text}' (seed: {seed})")
         
         text_mask, mask_array = self.create_melted_text_mask(text)
         
         # Create energy field background
         energy_bg = self.create_energy_field(seed, mask_array)
         
-        # Generate particle field
-        particles = self.generate_particle_field(seed, density=8000)
+        # Generate particle field, keeping only particles on the text
+        x, y, size, brightness, hue = self.generate_particle_field(
+            seed, density=PARTICLE_DENSITIES[density])
+        on_text = mask_array[y, x] > 50
+        x, y, size, brightness, hue = (a[on_text] for a in (x, y, size, brightness, hue))
         
         # Create particle overlay
-        particle_img = Image.new('RGBA', (self.width, self.height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(particle_img)
+        colors = np.empty((len(x), 4), dtype=np.uint8)
+        colors[:, :3] = hsv_to_rgb_array(hue, 0.8, brightness) * 255
+        colors[:, 3] = brightness * 255
         
-        for x, y, size, brightness, hue in particles:
-            if mask_array[int(y), int(x)] > 50:
-                r, g, b = colorsys.hsv_to_rgb(hue, 0.8, brightness)
-                color = (int(r * 255), int(g * 255), int(b * 255), int(brightness * 255))
-                draw.ellipse([x - size, y - size, x + size, y + size], fill=color)
+        with profiling.span('particles.splat', count=len(x)):
+            particles = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+            _splat_discs(particles, x, y, size, colors)
         
         # Composite
-        energy_bg = energy_bg.convert('RGBA')
-        result = Image.alpha_composite(energy_bg, particle_img)
-        result = result.convert('RGB')
+        with profiling.span('particles.composite'):
+            frame = np.array(energy_bg)
+            compositing.alpha_over(frame, particles[:, :, :3], particles[:, :, 3])
         
         # Add glow
-        enhancer = ImageEnhance.Brightness(result)
-        result = enhancer.enhance(1.3)
+        with profiling.span('particles.brightness'):
+            compositing.brightness(frame, 1.3)
         
         # Add chromatic aberration
-        result = self.add_chromatic_aberration(result, strength=3)
+        self.add_chromatic_aberration(frame, strength=round(3 * self.scale))
+        result = Image.fromarray(frame)
         
-        print("✅ Particle style complete")
+        logger.info("✅ Particle style complete")
         return result
     
+    @profiling.stage
     def generate_holographic_style(self, text, seed):
         """STYLE 2: Holographic Glitch"""
-        print(f"🌈 Generating HOLOGRAPHIC style for '{text}' (seed: {seed})")
+        logger.info(f"🌈 Generating HOLOGRAPHIC style for '{text}' (seed: {seed})")
         
-        text_mask, mask_array = self.create_melted_text_mask(text)
+        _, mask_array = self.create_melted_text_mask(text)
         
         # Create holographic background
-        holo_bg = self.create_holographic_effect()
-        
-        # Create glitched text layers
-        mask_rgb = Image.new('RGB', (self.width, self.height), (0, 0, 0))
+        frame = self.holographic_layer().copy()
         
         # Create RGB split effect
-        r_mask = self.shift_mask(text_mask, (-5, 0))
-        g_mask = text_mask
-        b_mask = self.shift_mask(text_mask, (5, 0))
-        
-        # Apply masks to background
-        r, g, b = holo_bg.split()
-        r_array = np.array(r)
-        g_array = np.array(g)
-        b_array = np.array(b)
-        
-        r_mask_array = np.array(r_mask)
-        g_mask_array = np.array(g_mask)
-        b_mask_array = np.array(b_mask)
-        
-        # Boost channels where text is
-        r_array = np.where(r_mask_array > 128, np.minimum(r_array + 100, 255), r_array).astype(np.uint8)
-        g_array = np.where(g_mask_array > 128, np.minimum(g_array + 80, 255), g_array).astype(np.uint8)
-        b_array = np.where(b_mask_array > 128, np.minimum(b_array + 120, 255), b_array).astype(np.uint8)
-        
-        result = Image.merge('RGB', (Image.fromarray(r_array), Image.fromarray(g_array), Image.fromarray(b_array)))
+        self.add_rgb_split(frame, mask_array)
         
         # Add glitch lines
-        random.seed(seed)
-        for _ in range(20):
-            y = random.randint(0, self.height)
-            offset = random.randint(-10, 10)
-            height = random.randint(2, 8)
-            crop = result.crop((0, y, self.width, min(y + height, self.height)))
-            result.paste(crop, (offset, y))
+        with profiling.span('holographic.glitch_lines'):
+            for top, bottom, offset in self.glitch_lines(seed):
+                compositing.shift_rows(frame, top, bottom, offset)
         
         # Add scan lines
-        result = self.add_scan_lines(result, seed)
+        self.add_scan_lines(frame, seed)
         
         # Enhance saturation
-        enhancer = ImageEnhance.Color(result)
-        result = enhancer.enhance(1.5)
+        with profiling.span('holographic.saturation'):
+            compositing.saturation(frame, 1.5)
+        result = Image.fromarray(frame)
         
-        print("✅ Holographic style complete")
+        logger.info("✅ Holographic style complete")
         return result
     
+    @profiling.stage
+    def add_rgb_split(self, frame, mask_array):
+        """Boost each channel of a frame array where its shifted copy of the text is, in place"""
+        # Only over the rows the text covers
+        shift = round(5 * self.scale)
+        text_rows = np.flatnonzero(mask_array.any(axis=1))
+        if len(text_rows):
+            rows = slice(text_rows[0], text_rows[-1] + 1)
+            on_text = mask_array[rows] > 128
+            band = frame[rows]
+            for c, (offset, amount) in enumerate(((shift, 100), (0, 80), (-shift, 120))):
+                where = compositing.shift_columns(on_text.copy(), offset) if offset else on_text
+                compositing.add(band[:, :, c], amount, where)
+        return frame
+    
+    def glitch_lines(self, seed):
+        """(top, bottom, offset) of each band of rows the glitch shifts sideways"""
+        rng = random.Random(seed)
+        s = self.scale
+        lines = []
+        for _ in range(20):
+            y = round(rng.randint(0, self.design_height) * s)
+            offset = round(rng.randint(-10, 10) * s)
+            height = max(1, round(rng.randint(2, 8) * s))
+            lines.append((y, min(y + height, self.height), offset))
+        return lines
+    
+    @profiling.stage
     def generate_liquid_metal_style(self, text, seed):
         """STYLE 3: Liquid Metal Chrome"""
-        print(f"💧 Generating LIQUID METAL style for '{text}' (seed: {seed})")
-        
-        text_mask, mask_array = self.create_melted_text_mask(text, font_size=220)
+        logger.info(f"💧 Generating LIQUID METAL style for '{text}' (seed: {seed})")
         
-        # Add drip effect to mask
-        text_mask = self.add_drip_effect(text_mask, seed)
-        mask_array = np.array(text_mask)
+        # Melted text with drip effect
+        text_mask = self.create_dripping_mask(text, seed, font_size=220)
+        mask_array = np.asarray(text_mask)
         
         # Create liquid metal background
-        bg = self.create_liquid_metal_bg(seed)
-        
-        # Create chrome/mercury effect
-        chrome_img = Image.new('RGB', (self.width, self.height), (0, 0, 0))
-        chrome_array = np.array(chrome_img)
-        bg_array = np.array(bg)
-        
-        # Apply metallic gradient to text
-        for y in range(self.height):
-            for x in range(self.width):
-                if mask_array[y, x] > 50:
-                    # Metallic gradient
-                    gradient = (y / self.height) * 0.6 + 0.4
-                    base = int(gradient * 200)
-                    chrome_array[y, x] = [base + 40, base + 50, base + 60]
-        
-        chrome_img = Image.fromarray(chrome_array)
-        
-        # Composite text over background
-        text_alpha = Image.fromarray(mask_array)
-        chrome_img.putalpha(text_alpha)
-        bg = bg.convert('RGBA')
-        result = Image.alpha_composite(bg, chrome_img)
-        result = result.convert('RGB')
+        frame = np.array(self.create_liquid_metal_bg(seed))
+        
+        # Composite chrome text over background
+        with profiling.span('liquid.composite'):
+            self.add_chrome(frame, mask_array)
         
         # Add reflections
-        result = self.add_reflections(result, text_mask)
+        self.add_reflections(frame, text_mask)
         
         # Add subtle glow
-        glow = result.filter(ImageFilter.GaussianBlur(radius=10))
-        result = Image.blend(result, glow, 0.3)
+        with profiling.span('liquid.glow'):
+            glow = compositing.gaussian_blur(frame, 10 * self.scale, self.quality)
+            compositing.blend(frame, glow, 0.3)
         
         # Enhance contrast
-        enhancer = ImageEnhance.Contrast(result)
-        result = enhancer.enhance(1.4)
+        with profiling.span('liquid.contrast'):
+            compositing.contrast(frame, 1.4)
+        result = Image.fromarray(frame)
         
-        print("✅ Liquid metal style complete")
+        logger.info("✅ Liquid metal style complete")
         return result
     
-    def generate(self, text, style='particle', seed=None, output_path=None):
-        """Main generation function"""
+    def chrome_shades(self):
+        """Metallic gradient color of the chrome text on each row"""
+        gradient = (np.arange(self.height) / self.height) * 0.6 + 0.4
+        base = (gradient * 200).astype(np.int64)
+        shades = base[:, None] + np.array([40, 50, 60])
+        # uint8 wrap-around near the bottom edge matches the original renders
+        return shades.astype(np.uint8)
+    
+    def add_chrome(self, frame, mask_array, rows=None):
+        """Composite chrome text over a frame array, in place; faint mask edges are black
+        
+        rows is the slice of canvas rows frame and mask_array hold (default: all).
+        """
+        shades = self.chrome_shades()[rows or slice(None)]
+        text_rows, text_cols = np.nonzero(mask_array)
+        alpha = mask_array[text_rows, text_cols]
+        chrome = shades[text_rows]
+        chrome[alpha <= 50] = 0
+        return compositing.alpha_over(frame, chrome, alpha, text_rows, text_cols)
+    
+    def render(self, text, style, seed, density='standard', size=None):
+        """Render a style in memory and return the image without saving it
+        
+        size=(width, height) renders straight at that size instead of this
+        generator's canvas, with the font scaled by the same factor.
+        """
+        if size is not None and tuple(size) != (self.width, self.height):
+            return self.at_size(*size).render(text, style, seed, density=density)
+        
+        renderer = styles.get(style)
+        with profiling.span('render', style=style, seed=seed,
+                            width=self.width, height=self.height):
+            return renderer.render(self, text, seed, density)
+    
+    def estimate(self, style, density='standard', size=None):
+        """Estimated seconds of render() with these arguments (see styles.Cost)"""
+        width, height = size or (self.width, self.height)
+        return styles.estimate(style, width, height, density)
+    
+    def render_many(self, jobs, threads=1, on_done=None):
+        """Render many images at once, on threads sharing this generator
+        
+        jobs are dicts of render() arguments (text, style, seed, and
+        optionally density and size). Returns the images in job order, the
+        same as rendering them one by one; the costliest start first.
+        on_done(done, total, image) is called as each one finishes.
+        """
+        def cost(job):
+            return self.estimate(job['style'], job.get('density', 'standard'), job.get('size'))
+        
+        return batch.run_threaded(lambda job: self.render(**job), list(jobs), threads, on_done, cost=cost)
+    
+    def render_sizes(self, text, style, seed, sizes, density='standard', font_scales=None, scale=1.0):
+        """Render once and derive an image for every (width, height) in sizes
+        
+        The render covers all sizes and each one is cut from its centre at its
+        own aspect ratio (see export.derive). Its font is picked so no size
+        gets larger text than rendering it alone would: font_scales maps a
+        size to that font scale (default: what at_size gives). scale < 1
+        renders a preview of every size. A single size is rendered directly.
+        """
+        sizes = list(dict.fromkeys(tuple(size) for size in sizes))
+        font_scales = font_scales or {
+            (width, height): min(width / self.width, height / self.height) * self.font_scale
+            for width, height in sizes}
+        
+        if len(sizes) == 1:
+            generator = self._fitted(*sizes[0], font_scales[sizes[0]]).preview(scale)
+            return {sizes[0]: generator.render(text, style, seed, density=density)}
+        
+        cover = export.covering_size(sizes)
+        # derive() scales a size's crop down, and its text with it
+        font_scale = min(font_scales[size] / export.shrink(cover, size) for size in sizes)
+        generator = self._fitted(*cover, font_scale).preview(scale)
+        image = generator.render(text, style, seed, density=density)
+        
+        with profiling.span('derive_sizes', sizes=len(sizes)):
+            return {(width, height): export.derive(image, (max(1, round(width * scale)),
+                                                          max(1, round(height * scale))))
+                    for width, height in sizes}
+    
+    def at_size(self, width, height):
+        """Generator for a (width, height) canvas with fonts scaled to fit it"""
+        if (width, height) == (self.width, self.height):
+            return self
+        if (width, height) not in self._sized:
+            scale = min(width / self.width, height / self.height) * self.font_scale
+            self._sized[(width, height)] = WildTextGenerator(width, height, font_scale=scale,
+                                                             quality=self.quality)
+        return self._sized[(width, height)]
+    
+    def _fitted(self, width, height, font_scale):
+        """Generator for a (width, height) canvas with the given font scale, kept for reuse"""
+        if (width, height, font_scale) == (self.width, self.height, self.font_scale):
+            return self
+        key = ('fitted', width, height, font_scale)
+        if key not in self._sized:
+            self._sized[key] = WildTextGenerator(width, height, font_scale=font_scale,
+                                                 quality=self.quality)
+        return self._sized[key]
+    
+    def preview(self, scale):
+        """Generator rendering this canvas at scale, with the same random geometry
+        
+        Its render of a seed is a small copy of this generator's render of that
+        seed, so a batch can be judged cheaply and only the pick drawn in full.
+        """
+        if scale == 1:
+            return self
+        kwargs = self.preview_kwargs(scale)
+        key = ('preview', kwargs['width'], kwargs['height'])
+        if key not in self._sized:
+            preview = WildTextGenerator(**kwargs)
+            preview._design = self
+            self._sized[key] = preview
+        return self._sized[key]
+    
+    def preview_kwargs(self, scale):
+        """Constructor arguments of preview(scale), e.g. for pool workers"""
+        return {
+            'width': max(1, round(self.width * scale)),
+            'height': max(1, round(self.height * scale)),
+            'font_scale': self.font_scale * scale,
+            'design_size': (self.width, self.height),
+            'quality': self.quality,
+        }
+    
+    def design(self):
+        """Generator for the full-size design canvas this one previews"""
+        if self._design is None:
+            self._design = WildTextGenerator(self.design_width, self.design_height,
+                                             font_scale=self.font_scale / self.scale,
+                                             quality=self.quality)
+        return self._design
+    
+    def _layer_dims(self, *dims):
+        """Cache dims of a layer, telling previews apart from full renders"""
+        if self.scale == 1:
+            return dims
+        return dims + (self.design_width, self.design_height)
+    
+    def animate(self, text, style, seed, frames=60, density='standard'):
+        """Yield the frames of a seamless loop of a style (see animation.py)"""
+        # Imported here: animation builds on this module's helpers
+        import animation
+        return animation.animate(self, text, style, seed, frames=frames, density=density)
+    
+    @profiling.stage
+    def generate(self, text, style='particle', seed=None, output_path=None, density='standard',
+                 exporter=None):
+        """Main generation function
+        
+        With an exporter (see export.py) the PNG is written on its background
+        threads and this returns as soon as the render is done.
+        """
         if seed is None:
             seed = random.randint(0, 999999)
         
-        # Generate based on style
-        if style == 'particle':
-            result = self.generate_particle_style(text, seed)
-        elif style == 'holographic':
-            result = self.generate_holographic_style(text, seed)
-        elif style == 'liquid':
-            result = self.generate_liquid_metal_style(text, seed)
-        else:
-            raise ValueError(f"Unknown style: {style}. Use 'particle', 'holographic', or 'liquid'")
-        
-        # Save output
         if output_path is None:
-            safe_text = text.replace(' ', '_').replace('/', '_')[:20]
-            output_path = self.output_dir / f"{safe_text}_{style}_seed{seed}.png"
+            output_path = export.output_path(self.output_stem(text, style, seed), 'png')
+        key = self.result_key(text, style, seed, density, 'png',
+                              (exporter or export.Exporter(workers=0)).options('png'))
+        cached = result_cache.cached_export([((self.width, self.height), 'png', output_path)],
+                                            {output_path: key})
+        if cached:
+            logger.info(f"♻️  Cached: {output_path}")
+            return cached[(self.width, self.height)], output_path
         
-        result.save(output_path, 'PNG', quality=95)
-        print(f"💾 Saved: {output_path}")
+        result = self.render(text, style, seed, density=density)
+        
+        # Save output
+        if exporter is None:
+            with profiling.span('save_png'):
+                result.save(output_path, 'PNG')
+            result_cache.cache.store(key, 'png', output_path)
+        else:
+            exporter.save(result, output_path, 'png',
+                          on_written=lambda path: result_cache.cache.store(key, 'png', path))
+        logger.info(f"💾 Saved: {output_path}")
         
         return result, output_path
+    
+    @profiling.stage
+    def export(self, text, style, seed, sizes=None, formats=('png',), exporter=None,
+               density='standard'):
+        """Render once, then write every size in every format
+        
+        sizes defaults to this canvas, saved under generate()'s file name;
+        other sizes get a _WxH suffix. Returns ({size: image}, paths).
+        """
+        exporter = exporter or export.Exporter(workers=0)
+        stem = self.output_stem(text, style, seed)
+        targets = export.targets(stem, sizes or [(self.width, self.height)], formats,
+                                 sized=sizes is not None)
+        keys = {path: self.result_key(text, style, seed, density, fmt, exporter.options(fmt), size)
+                for size, fmt, path in targets}
+        images = result_cache.cached_export(targets, keys)
+        if images is not None:
+            paths = [path for _, _, path in targets]
+            for path in paths:
+                logger.info(f"♻️  Cached: {path}")
+            return images, paths
+        
+        images = self.render_sizes(text, style, seed, sizes or [(self.width, self.height)],
+                                   density=density)
+        fmts = {path: fmt for _, fmt, path in targets}
+        
+        def store(path):
+            result_cache.cache.store(keys[path], fmts[path], path)
+        
+        paths = exporter.save_all(images, stem, formats, sized=sizes is not None, on_written=store)
+        for path in paths:
+            logger.info(f"💾 Saved: {path}")
+        return images, paths
+    
+    def result_key(self, text, style, seed, density, fmt, options, size=None):
+        """Result cache key (see result_cache.py) of a saved render of this generator"""
+        return result_cache.result_key(
+            kind='image', text=text, style=style, seed=seed, density=density, format=fmt,
+            options=options, size=list(size or (self.width, self.height)),
+            canvas=[self.width, self.height], design=[self.design_width, self.design_height],
+            font_scale=self.font_scale, quality=self.quality, font=fonts.registry.find(fonts.BOLD_FONTS))
+    
+    def output_stem(self, text, style, seed):
+        """Output path of a render, without extension"""
+        safe_text = text.replace(' ', '_').replace('/', '_')[:20]
+        suffix = '_preview' if self.scale < 1 else ''
+        if self.quality != 'max':
+            suffix = f"_{self.quality}{suffix}"
+        self.output_dir.mkdir(exist_ok=True)
+        return self.output_dir / f"{safe_text}_{style}_seed{seed}{suffix}"
 
-def main():
+def _render_batch_job(job):
+    """--workers task: render and save one seed inside a pool worker"""
+    text, style, seed, density, sizes, formats, export_options = job
+    # The pool already keeps every core busy, so workers encode inline
+    _, paths = batch.call_worker('export', {
+        'text': text, 'style': style, 'seed': seed, 'density': density, 'sizes': sizes,
+        'formats': formats, 'exporter': export.Exporter(workers=0, **export_options)})
+    return paths, seed
+
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description='🔥 WILD TEXT GENERATOR - Create jaw-dropping text visuals',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -380,18 +891,94 @@ Examples:
   python3 wild_generator.py --text "NEXT LEVEL" --style particle
   python3 wild_generator.py --text "GENIUS" --style holographic --batch 5
   python3 wild_generator.py --text "WILD" --style liquid --seed 42
+  python3 wild_generator.py --text "VIBES" --style liquid --batch 20 --preview
+  python3 wild_generator.py --text "WILD" --style holographic --animate gif --frames 60
+  python3 wild_generator.py --text "VIBES" --sizes 1080x1350 1080 1920x1080 --format png webp
+  python3 wild_generator.py --text "VIBES" --style liquid --seed 42 --poster 7200x10800
         """
     )
     
     parser.add_argument('--text', required=True, help='Text to generate')
-    parser.add_argument('--style', default='particle', choices=['particle', 'holographic', 'liquid'],
+    parser.add_argument('--style', default='particle', choices=styles.names(),
                         help='Visual style (default: particle)')
     parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducibility')
     parser.add_argument('--batch', type=int, default=1, help='Number of variations to generate')
     parser.add_argument('--width', type=int, default=1080, help='Output width (default: 1080)')
     parser.add_argument('--height', type=int, default=1080, help='Output height (default: 1080)')
+    parser.add_argument('--sizes', nargs='+', type=export.size_type, metavar='WxH',
+                        help='Export these sizes from one render, e.g. 1080x1350 1080 1920x1080')
+    parser.add_argument('--format', nargs='+', default=['png'], choices=list(export.FORMATS),
+                        help='Export formats (default: png)')
+    parser.add_argument('--png-compress', type=int, default=6, choices=range(10), metavar='0-9',
+                        help='PNG compression level, 0 = fastest, 9 = smallest (default: 6)')
+    parser.add_argument('--lossy-quality', type=int, default=90,
+                        help='WebP/JPEG quality (default: 90)')
+    parser.add_argument('--layer-cache', metavar='DIR',
+                        help='Also keep reusable layers (e.g. backgrounds) as .npy files in DIR')
+    parser.add_argument('--result-cache', metavar='DIR',
+                        help='Keep finished files in DIR and copy them instead of re-rendering repeats')
+    parser.add_argument('--result-cache-mb', type=int, default=result_cache.DEFAULT_MAX_MB, metavar='MB',
+                        help=f'Size cap of --result-cache; least recently used files go first '
+                             f'(default: {result_cache.DEFAULT_MAX_MB})')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Render batch variations in N parallel processes (default: 1)')
+    parser.add_argument('--threads', type=int, default=1,
+                        help='Render batch variations on N threads in this process, sharing '
+                             'caches: less memory than --workers (default: 1)')
+    parser.add_argument('--density', default='standard', choices=list(PARTICLE_DENSITIES),
+                        help='Particle density preset for the particle style (default: standard)')
+    parser.add_argument('--quality', default='max', choices=compositing.QUALITIES,
+                        help='Blur quality: max blurs exactly, standard and draft blur big radii '
+                             'downsampled for speed (default: max)')
+    parser.add_argument('--animate', choices=['gif', 'apng', 'frames'],
+                        help='Render a seamless loop as GIF, APNG or numbered PNG frames')
+    parser.add_argument('--frames', type=int, default=60, help='Frames per loop with --animate (default: 60)')
+    parser.add_argument('--fps', type=int, default=20, help='Loop frame rate with --animate (default: 20)')
+    parser.add_argument('--preview', action='store_true',
+                        help='Render the batch as small previews, then the picked seed at full size')
+    parser.add_argument('--preview-scale', type=float, default=0.25,
+                        help='Preview size as a fraction of the full size (default: 0.25)')
+    parser.add_argument('--poster', type=export.size_type, metavar='WxH',
+                        help='Render a print-size PNG (e.g. 7200x10800) in tiles, laid out like a '
+                             '--width wide render')
+    parser.add_argument('--tile-budget', type=int, default=512, metavar='MB',
+                        help='Memory budget of a --poster render (default: 512)')
+    parser.add_argument('--profile', metavar='OUT.json',
+                        help='Write per-stage wall time, CPU time and allocations to this JSON file')
+    parser.add_argument('--daemon', action=daemon.ServeAction,
+                        help='Stay resident with everything loaded and render what later runs forward '
+                             'to it over a local socket (Ctrl-C to stop)')
+    parser.add_argument('--no-daemon', action='store_true',
+                        help='Render in this process even if a --daemon is running')
+    
+    argv = sys.argv[1:] if argv is None else argv
+    args = parser.parse_args(argv)
+    if args.poster and (args.animate or args.preview or args.sizes):
+        parser.error("--poster can't be combined with --animate, --preview or --sizes")
+    if args.workers > 1 and args.threads > 1:
+        parser.error("Use either --workers or --threads")
+    if args.animate and (args.frames < 1 or args.fps < 1):
+        parser.error("--frames and --fps must be at least 1")
+    if args.animate and args.preview:
+        parser.error("--preview picks a still seed; render loops without it")
+    
+    # A running --daemon has numpy, fonts and caches warm; --preview asks for input here
+    if not (args.no_daemon or args.preview):
+        code = daemon.forward('wild_generator', argv)
+        if code is not None:
+            sys.exit(code)
     
-    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    if args.profile:
+        # tracemalloc can't tell threads apart, so threaded runs skip allocations
+        profiling.profiler.enable(track_memory=args.threads <= 1)
+    
+    if args.layer_cache:
+        # Exported too, so pool workers started with spawn find the same cache
+        os.environ[layers.CACHE_DIR_ENV] = args.layer_cache
+        layers.cache.enable_disk(args.layer_cache)
+    if args.result_cache:
+        result_cache.enable_from_args(args.result_cache, args.result_cache_mb)
     
     print("🔥 WILD TEXT GENERATOR 🔥")
     print(f"Text: '{args.text}'")
@@ -399,26 +986,118 @@ Examples:
     print(f"Batch: {args.batch}")
     print("=" * 50)
     
-    generator = WildTextGenerator(width=args.width, height=args.height)
-    
+    seeds = batch.batch_seeds(args.seed, args.batch)
     results = []
-    for i in range(args.batch):
-        print(f"\n[{i+1}/{args.batch}]")
+    
+    sizes = args.sizes
+    export_options = {'compress_level': args.png_compress, 'quality': args.lossy_quality}
+    # Previews are for picking a seed: one PNG each, the pick gets every size and format
+    export_kwargs = {'sizes': None, 'formats': ['png']} if args.preview else {
+        'sizes': sizes, 'formats': args.format}
+    
+    generator_kwargs = {'width': args.width, 'height': args.height, 'quality': args.quality}
+    if args.preview:
+        generator_kwargs = WildTextGenerator(**generator_kwargs).preview_kwargs(args.preview_scale)
+        print(f"👀 Previewing at {generator_kwargs['width']}x{generator_kwargs['height']}")
+    
+    if args.animate:
+        # Imported here: animation builds on this module's helpers
+        import animation
+        generator = WildTextGenerator(**generator_kwargs)
+        safe_text = args.text.replace(' ', '_').replace('/', '_')[:20]
+        suffix = {'gif': '.gif', 'apng': '.png', 'frames': ''}[args.animate]
         
-        # Use provided seed or generate random one
-        if args.seed is not None:
-            seed = args.seed + i
-        else:
-            seed = random.randint(0, 999999)
+        for i, seed in enumerate(seeds):
+            print(f"\n[{i+1}/{args.batch}] 🎞️  {args.frames} frame {args.style} loop (seed: {seed})")
+            generator.output_dir.mkdir(exist_ok=True)
+            path = generator.output_dir / f"{safe_text}_{args.style}_seed{seed}_loop{suffix}"
+            frames = generator.animate(args.text, args.style, seed, frames=args.frames,
+                                       density=args.density)
+            path = animation.save_animation(frames, path, args.animate, fps=args.fps)
+            results.append((None, [path], seed))
+    elif args.poster:
+        # Imported here: poster builds on this module's helpers
+        import poster
+        size = args.poster
+        try:
+            generator = poster.poster_generator(*size, design_width=args.width, quality=args.quality)
+            poster.plan(generator, args.text, args.style, args.tile_budget, args.density)
+        except ValueError as e:
+            parser.error(str(e))
+        # One at a time: each poster already uses the whole memory budget
+        for i, seed in enumerate(seeds):
+            print(f"\n[{i+1}/{args.batch}] 🖼️  {size[0]}x{size[1]} {args.style} poster (seed: {seed})")
+            path = export.output_path(generator.output_stem(args.text, args.style, seed), 'png', size)
+            poster.render_poster(generator, args.text, args.style, seed, path,
+                                 budget_mb=args.tile_budget, density=args.density,
+                                 compress_level=args.png_compress)
+            print(f"💾 Saved: {path}")
+            results.append((None, [path], seed))
+    elif args.workers > 1:
+        print(f"⚡ Rendering on {args.workers} workers")
+        jobs = [(args.text, args.style, seed, args.density, export_kwargs['sizes'],
+                 export_kwargs['formats'], export_options) for seed in seeds]
+        
+        def report(done, total, rendered):
+            paths, seed = rendered
+            print(f"[{done}/{total}] ✅ seed {seed} → {', '.join(map(str, paths))}")
+        
+        rendered = batch.run_parallel(
+            _render_batch_job, jobs, args.workers, WildTextGenerator,
+            generator_kwargs, on_done=report)
+        results = [(None, paths, seed) for paths, seed in rendered]
+    elif args.threads > 1:
+        print(f"🧵 Rendering on {args.threads} threads")
+        generator = WildTextGenerator(**generator_kwargs)
+        # Per-stage chatter from many threads would interleave on the console
+        logger.setLevel(logging.WARNING)
         
-        result, path = generator.generate(args.text, args.style, seed)
-        results.append((result, path, seed))
+        with export.Exporter(**export_options) as exporter:
+            def render_seed(seed):
+                images, paths = generator.export(args.text, args.style, seed, exporter=exporter,
+                                                 density=args.density, **export_kwargs)
+                return images, paths, seed
+            
+            def report(done, total, rendered):
+                _, paths, seed = rendered
+                print(f"[{done}/{total}] ✅ seed {seed} → {', '.join(map(str, paths))}")
+            
+            results = batch.run_threaded(render_seed, seeds, args.threads, on_done=report)
+        logger.setLevel(logging.NOTSET)
+    else:
+        generator = WildTextGenerator(**generator_kwargs)
+        
+        # Files are encoded in the background while the next seed renders
+        with export.Exporter(**export_options) as exporter:
+            for i, seed in enumerate(seeds):
+                print(f"\n[{i+1}/{args.batch}]")
+                images, paths = generator.export(args.text, args.style, seed, exporter=exporter,
+                                                 density=args.density, **export_kwargs)
+                results.append((images, paths, seed))
+    
+    if args.preview:
+        # The full render of a seed is exactly what a plain run would produce
+        seed = batch.pick_seed(seeds)
+        if seed is None:
+            print("\n💡 Render your pick at full size with --seed <seed> (without --preview)")
+        else:
+            generator = WildTextGenerator(width=args.width, height=args.height, quality=args.quality)
+            with export.Exporter(**export_options) as exporter:
+                images, paths = generator.export(args.text, args.style, seed, sizes, args.format,
+                                                 exporter, density=args.density)
+            results.append((images, paths, seed))
     
     print("\n" + "=" * 50)
     print("🎉 GENERATION COMPLETE!")
-    print(f"Generated {len(results)} image(s):")
-    for _, path, seed in results:
-        print(f"  • {path.name} (seed: {seed})")
+    print(f"Generated {sum(len(paths) for _, paths, _ in results)} image(s):")
+    for _, paths, seed in results:
+        for path in paths:
+            print(f"  • {path.name} (seed: {seed})")
+    if args.workers == 1:
+        print(f"🔤 Cache: {fonts.format_stats()}")
+    if args.profile:
+        profiling.profiler.write(args.profile)
+        print(f"⏱️  Profile: {args.profile}")
     print("=" * 50)
 
 if __name__ == '__main__':